@@ -1,17 +1,63 @@
 from django.contrib import admin
 
-from .models import Course, Enrollment
+from .models import Completion, Course, Enrollment, MeetingTime, Prerequisite, Waitlist
+from .services import promote_waitlist
+
+
+class MeetingTimeInline(admin.TabularInline):
+    model = MeetingTime
+    extra = 0
+
+
+class PrerequisiteInline(admin.TabularInline):
+    model = Prerequisite
+    fk_name = "course"
+    autocomplete_fields = ("requires",)
+    extra = 0
 
 
 @admin.register(Course)
 class CourseAdmin(admin.ModelAdmin):
-    list_display = ("code", "title", "semester", "credits", "capacity")
+    list_display = ("code", "title", "semester", "credits", "capacity", "enrolled_count")
+    readonly_fields = ("enrolled_count", "waitlist_count")
+    inlines = [MeetingTimeInline, PrerequisiteInline]
     search_fields = ("code", "title", "semester")
     list_filter = ("semester",)
 
+    def save_model(self, request, obj, form, change):
+        # Course.save() leaves the counters alone, so a stale form cannot overwrite them.
+        super().save_model(request, obj, form, change)
+        if change and "capacity" in form.changed_data:
+            promote_waitlist(obj.pk)
+
 
 @admin.register(Enrollment)
 class EnrollmentAdmin(admin.ModelAdmin):
     list_display = ("student", "course", "enrolled_at")
     list_filter = ("enrolled_at",)
     search_fields = ("student__username", "student__email", "course__title", "course__code")
+
+
+@admin.register(Completion)
+class CompletionAdmin(admin.ModelAdmin):
+    list_display = ("student", "course", "completed_at")
+    list_select_related = ("student", "course")
+    autocomplete_fields = ("student", "course")
+    search_fields = ("student__username", "course__code")
+
+
+@admin.register(Waitlist)
+class WaitlistAdmin(admin.ModelAdmin):
+    list_display = ("course", "position", "student", "joined_at")
+    list_select_related = ("course", "student")
+    search_fields = ("student__username", "course__code")
+
+    # Positions are maintained by enrollment.services; edit the queue through it.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,221 @@
+"""
+Admission control for the write endpoints during registration.
+
+A request to enroll or drop must get past three gates before its view runs:
+a token bucket per student, a token bucket shared by everyone, and a cap on
+how many such requests are being served at once. A request turned away gets
+a waiting-room page (HTTP 429 for one student going too fast, 503 when the
+whole site is saturated) with ``Retry-After`` and a place in line. It does not
+queue on SQLite's single writer until it times out, and the catalog stays
+responsive for readers.
+
+Limits come from ``settings.ADMISSION_WINDOWS`` while a registration window is
+open and ``settings.ADMISSION_LIMITS`` otherwise. All state sits in the shared
+Django cache and changes only through ``cache.incr``/``cache.decr``, which
+are atomic on every backend, so the limits hold across server processes.
+
+A bucket is kept as two fixed-window counters. One window is the time a
+bucket takes to refill (``burst / rate``). Tokens used are the current
+window's count plus the previous window's, weighted by how much of it still
+overlaps. That gives a token bucket's average rate and burst without a
+read-modify-write of a shared float.
+"""
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+IN_FLIGHT_KEY = "admission:in_flight"
+GENERATION_KEY = f"{IN_FLIGHT_KEY}:generation"
+# A worker that dies mid-request never releases its slot; the count resets after this long without admissions.
+IN_FLIGHT_TIMEOUT = 60
+# Turned-away requests share a place in line over this many seconds.
+WAITING_SLICE = 10
+MAX_RETRY_AFTER = 60
+
+
+def _incr(key: str, timeout: float, delta: int = 1) -> int:
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        cache.add(key, 0, timeout=timeout)
+        return cache.incr(key, delta)
+
+
+def _decr(key: str) -> None:
+    try:
+        cache.decr(key)
+    except ValueError:
+        pass  # Expired in the meantime; nothing left to give back.
+
+
+def _slot_key(generation: int) -> str:
+    return f"{IN_FLIGHT_KEY}:{generation}"
+
+
+def _take_slot() -> tuple:
+    """
+    Count one more request in flight; returns ``(key, count)``.
+
+    The count lives in a key per generation. When it has expired, the slots it
+    counted are written off and a new generation starts, so a late release of
+    one of those slots decrements its own dead key instead of the new count.
+    """
+    generation = cache.get_or_set(GENERATION_KEY, 0, timeout=None)
+    key = _slot_key(generation)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        key = _slot_key(_incr(GENERATION_KEY, timeout=None))
+        count = _incr(key, timeout=IN_FLIGHT_TIMEOUT)
+    # incr keeps the original expiry; only a count nobody has used for a while should lapse.
+    cache.touch(key, IN_FLIGHT_TIMEOUT)
+    return key, count
+
+
+def in_flight() -> int:
+    """Admitted write requests not yet released, in the current generation."""
+    return cache.get(_slot_key(cache.get(GENERATION_KEY, 0)), 0)
+
+
+class TokenBucket:
+    """``burst`` tokens, refilled at ``rate`` per second, approximated by two window counters."""
+
+    def __init__(self, name: str, rate: float, burst: int):
+        self.name, self.rate, self.burst = name, rate, burst
+        self.window = burst / rate
+
+    def take(self, now: float):
+        """
+        Take a token; returns ``(key, 0)`` on success or ``(None, seconds)`` until one frees up.
+
+        The key is what ``refund`` needs to give the token back.
+        """
+        index, offset = divmod(now, self.window)
+        key = f"admission:{self.name}:{int(index)}"
+        used = _incr(key, timeout=math.ceil(2 * self.window) + 1)
+        previous = cache.get(f"admission:{self.name}:{int(index) - 1}", 0)
+        weight = 1 - offset / self.window
+        if previous * weight + used <= self.burst:
+            return key, 0
+        _decr(key)
+        if used > self.burst or not previous:
+            return None, self.window - offset
+        # When the previous window's share has decayed enough to fit this request.
+        return None, max(self.window * (1 - (self.burst - used) / previous) - offset, 0)
+
+    @staticmethod
+    def refund(key: str) -> None:
+        _decr(key)
+
+
+@dataclass
+class Admission:
+    admitted: bool
+    status: int = 200
+    retry_after: int = 0
+    position: int = 0
+    # The in-flight key the slot was counted in; release gives it back there.
+    slot_key: str = ""
+
+    def release(self) -> None:
+        if self.slot_key:
+            _decr(self.slot_key)
+            self.slot_key = ""
+
+
+def _parse(moment) -> datetime:
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def current_limits(now: datetime = None) -> dict:
+    """The limits in force at ``now``: the open registration window's, else the defaults (``None`` = no limits)."""
+    now = now or datetime.now(timezone.utc)
+    for window in settings.ADMISSION_WINDOWS:
+        if _parse(window["start"]) <= now < _parse(window["end"]):
+            return {**(settings.ADMISSION_LIMITS or {}), **window["limits"]}
+    return settings.ADMISSION_LIMITS
+
+
+def _waiting(status: int, wait: float, limits: dict, now: float) -> Admission:
+    position = _incr(f"admission:waiting:{int(now // WAITING_SLICE)}", timeout=2 * WAITING_SLICE)
+    # Spread the queue over the global refill rate so everyone told to come back does not return at once.
+    if limits.get("global_rate"):
+        wait = max(wait, position / limits["global_rate"])
+    return Admission(False, status, min(max(math.ceil(wait), 1), MAX_RETRY_AFTER), position)
+
+
+def admit(user_id: int) -> Admission:
+    """
+    Let one write request in, or say when to come back.
+
+    An admitted request holds a token from each bucket and an in-flight slot;
+    call ``release()`` on the result when it finishes to free the slot. A
+    request turned away gives back the tokens it already took.
+    """
+    limits = current_limits()
+    if not limits:
+        return Admission(True)
+    now = time.time()
+    buckets = []
+    if limits.get("user_rate"):
+        buckets.append((429, TokenBucket(f"user:{user_id}", limits["user_rate"], limits["user_burst"])))
+    if limits.get("global_rate"):
+        buckets.append((503, TokenBucket("global", limits["global_rate"], limits["global_burst"])))
+
+    taken = []
+    for status, bucket in buckets:
+        key, wait = bucket.take(now)
+        if key is None:
+            for key in taken:
+                TokenBucket.refund(key)
+            return _waiting(status, wait, limits, now)
+        taken.append(key)
+
+    admission = Admission(True)
+    if limits.get("max_in_flight"):
+        slot_key, count = _take_slot()
+        if count > limits["max_in_flight"]:
+            _decr(slot_key)
+            for key in taken:
+                TokenBucket.refund(key)
+            # Slots free up as soon as a write commits, so a short wait is enough.
+            return _waiting(503, 1, limits, now)
+        admission.slot_key = slot_key
+    return admission
+
+
+def waiting_room(request, admission: Admission):
+    response = render(
+        request,
+        "enrollment/waiting_room.html",
+        {"retry_after": admission.retry_after, "position": admission.position},
+        status=admission.status,
+    )
+    response["Retry-After"] = str(admission.retry_after)
+    return response
+
+
+def admission_controlled(view):
+    """Run ``view`` for POSTs only once ``admit`` lets the student in; otherwise show the waiting room."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method != "POST":
+            return view(request, *args, **kwargs)
+        admission = admit(request.user.pk)
+        if not admission.admitted:
+            return waiting_room(request, admission)
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            admission.release()
+
+    return wrapper
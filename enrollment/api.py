@@ -0,0 +1,233 @@
+"""
+Read-only JSON endpoints for the catalog, seat availability and schedule checks.
+
+Rows are read with ``values()`` and serialised straight to compact JSON, so no
+model instances or templates are involved. The JSON endpoints accept
+``?fields=code,title`` to trim the payload to the fields a client needs.
+``seat_stream_api`` pushes seat changes as server-sent events, and
+``schedule_conflicts_api`` checks courses against the user's timetable.
+"""
+import asyncio
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import (
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+
+from .cache import cached_course
+from .feed import aseat_snapshots, seat_feed
+from .forms import CourseFilterForm
+from .models import Course
+from .pagination import MAX_SQL_INTEGER, paginate_keyset
+from .schedule import find_conflicts
+from .views import COURSES_PER_PAGE, filter_catalog
+
+# Public field name -> (values() lookup, Course attribute).
+FIELDS = {
+    "id": ("pk", "pk"),
+    "code": ("code", "code"),
+    "title": ("title", "title"),
+    "description": ("description", "description"),
+    "semester": ("semester", "semester"),
+    "credits": ("credits", "credits"),
+    "capacity": ("capacity", "capacity"),
+    "enrolled": ("enrolled_count", "enrolled_count"),
+    "seats_remaining": ("open_seats", "seats_remaining"),
+    "waitlist": ("waitlist_count", "waitlist_count"),
+}
+DEFAULT_FIELDS = ("id", "code", "title", "semester", "credits", "capacity", "seats_remaining")
+SEAT_FIELDS = ("id", "capacity", "enrolled", "seats_remaining", "waitlist")
+MAX_BATCH_IDS = 500
+
+# Seat stream timings. Streams end after STREAM_SECONDS and the client reconnects,
+# which bounds how long a vanished client can hold a watcher.
+STREAM_SECONDS = 5 * 60
+KEEPALIVE_SECONDS = 20
+RECONNECT_MS = 1000
+POLL_MS = 10 * 1000
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _json(data, status: int = 200) -> JsonResponse:
+    return JsonResponse(data, status=status, json_dumps_params={"separators": (",", ":")})
+
+
+def api_view(view):
+    """GET-only, authenticated JSON view; ``BadRequest`` becomes a 400."""
+
+    @require_GET
+    @wraps(view)
+    def wrapper(request: HttpRequest, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _json({"error": "Authentication required."}, status=401)
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as exc:
+            return _json({"error": str(exc)}, status=400)
+
+    return wrapper
+
+
+def _selected_fields(request: HttpRequest, default=DEFAULT_FIELDS) -> list:
+    raw = request.GET.get("fields")
+    if not raw:
+        return list(default)
+    fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+    unknown = [name for name in fields if name not in FIELDS]
+    if unknown:
+        raise BadRequest(f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(FIELDS)}.")
+    return fields
+
+
+def _rows(queryset, fields: list, extra=()):
+    lookups = [FIELDS[name][0] for name in fields]
+    rows = queryset.values(*dict.fromkeys([*lookups, *extra]))
+    return rows, lambda row: {name: row[lookup] for name, lookup in zip(fields, lookups)}
+
+
+def _course_ids(request: HttpRequest) -> list:
+    try:
+        ids = list(dict.fromkeys(int(value) for value in request.GET.get("ids", "").split(",") if value.strip()))
+    except ValueError:
+        raise BadRequest("ids must be a comma-separated list of integers.")
+    if any(abs(pk) > MAX_SQL_INTEGER for pk in ids):
+        raise BadRequest("ids must be a comma-separated list of integers.")
+    if not ids:
+        raise BadRequest("Pass at least one course id as ?ids=1,2,3.")
+    if len(ids) > MAX_BATCH_IDS:
+        raise BadRequest(f"At most {MAX_BATCH_IDS} ids per request.")
+    return ids
+
+
+@api_view
+def course_list_api(request: HttpRequest) -> JsonResponse:
+    fields = _selected_fields(request)
+    form = CourseFilterForm(request.GET or None)
+    if form.is_bound and not form.is_valid():
+        raise BadRequest(form.errors.as_text())
+    courses, ordering = filter_catalog(form)
+    rows, serialise = _rows(courses, fields, extra=ordering)
+    page = paginate_keyset(rows, ordering, request.GET, COURSES_PER_PAGE)
+    return _json({
+        "results": [serialise(row) for row in page],
+        "next": page.next_cursor,
+        "previous": page.previous_cursor,
+    })
+
+
+@api_view
+def course_detail_api(request: HttpRequest, pk: int) -> JsonResponse:
+    fields = _selected_fields(request, default=FIELDS)
+    try:
+        course = cached_course(pk)
+    except Course.DoesNotExist:
+        return _json({"error": "Course not found."}, status=404)
+    return _json({name: getattr(course, FIELDS[name][1]) for name in fields})
+
+
+@api_view
+def seat_availability_api(request: HttpRequest) -> JsonResponse:
+    """Seats for up to ``MAX_BATCH_IDS`` courses given as ``?ids=1,2,3``, in one query."""
+    fields = _selected_fields(request, default=SEAT_FIELDS)
+    ids = _course_ids(request)
+    rows, serialise = _rows(Course.objects.with_seat_counts().filter(pk__in=ids), fields, extra=["pk"])
+    found = {row["pk"]: serialise(row) for row in rows}
+    return _json({
+        "results": [found[pk] for pk in ids if pk in found],
+        "missing": [pk for pk in ids if pk not in found],
+    })
+
+
+@api_view
+def schedule_conflicts_api(request: HttpRequest) -> JsonResponse:
+    """
+    Check up to ``MAX_BATCH_IDS`` courses (``?ids=1,2,3``) against the user's schedule.
+
+    Served from the cached schedule and slots, so a warm check runs no queries.
+    """
+    ids = _course_ids(request)
+    conflicts = find_conflicts(request.user.pk, ids)
+    return _json({
+        "results": [{"id": pk, "fits": not conflicts[pk], "conflicts": conflicts[pk]} for pk in ids if pk in conflicts],
+        "missing": [pk for pk in ids if pk not in conflicts],
+    })
+
+
+def _sse(snapshots) -> str:
+    return "".join(
+        f"event: seats\ndata: {json.dumps(snapshot, separators=(',', ':'))}\n\n" for snapshot in snapshots
+    )
+
+
+async def _seat_events(watcher, snapshots: dict):
+    """Initial counts, then every change until ``STREAM_SECONDS`` is up and the client reconnects."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + STREAM_SECONDS
+    try:
+        yield f"retry: {RECONNECT_MS}\n\n" + _sse(snapshots.values())
+        while (remaining := deadline - loop.time()) > 0:
+            changed = await watcher.changes(timeout=min(KEEPALIVE_SECONDS, remaining))
+            fresh = [snapshot for pk, snapshot in changed.items() if snapshots.get(pk) != snapshot]
+            snapshots.update((snapshot["id"], snapshot) for snapshot in fresh)
+            yield _sse(fresh) or ": keepalive\n\n"
+    finally:
+        seat_feed.unwatch(watcher)
+
+
+class SeatStreamResponse(StreamingHttpResponse):
+    """Drops its watcher when the server closes the response, even if the stream was abandoned."""
+
+    def __init__(self, watcher, snapshots: dict):
+        super().__init__(_seat_events(watcher, snapshots), content_type="text/event-stream")
+        self.watcher = watcher
+
+    def close(self):
+        seat_feed.unwatch(self.watcher)
+        super().close()
+
+
+async def seat_stream_api(request: HttpRequest) -> HttpResponse:
+    """
+    Server-sent ``seats`` events for ``?ids=1,2,3``, pushed from the in-process seat feed.
+
+    Under ASGI the connection stays open for ``STREAM_SECONDS``. WSGI would tie up
+    a worker thread per watcher, so there the current counts are sent once and
+    the browser's EventSource polls by reconnecting after ``retry``.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    if not await sync_to_async(lambda: request.user.is_authenticated)():
+        return _json({"error": "Authentication required."}, status=401)
+    try:
+        ids = _course_ids(request)
+    except BadRequest as exc:
+        return _json({"error": str(exc)}, status=400)
+
+    if isinstance(request, ASGIRequest):
+        # Watch before reading so nothing committed in between is missed.
+        watcher = seat_feed.watch(ids)
+        try:
+            snapshots = await aseat_snapshots(ids)
+        except BaseException:
+            seat_feed.unwatch(watcher)
+            raise
+        response = SeatStreamResponse(watcher, snapshots)
+    else:
+        snapshots = await aseat_snapshots(ids)
+        response = HttpResponse(
+            f"retry: {POLL_MS}\n\n" + _sse(snapshots.values()), content_type="text/event-stream"
+        )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
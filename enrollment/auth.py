@@ -0,0 +1,58 @@
+"""
+A per-process cache of authenticated users.
+
+``AuthenticationMiddleware`` loads the ``auth_user`` row on every request.
+Entries here are keyed by user id and remember the session auth hash they were
+verified against. A request is served from the cache only if its session
+carries that same hash. A password change alters the hash and a save drops the
+entry (``forget_user``), so only changes that bypass ``save()`` can go unseen,
+and then for at most ``USER_CACHE_SECONDS``. Other processes find out through
+that expiry.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import HASH_SESSION_KEY
+
+MAX_CACHED_USERS = 10_000
+
+_users = {}
+_lock = threading.Lock()
+
+
+def forget_user(user_id) -> None:
+    with _lock:
+        _users.pop(user_id, None)
+
+
+def clear() -> None:
+    with _lock:
+        _users.clear()
+
+
+def get_user(request):
+    """``django.contrib.auth.get_user`` backed by the per-process cache."""
+    timeout = settings.USER_CACHE_SECONDS
+    try:
+        user_id = auth._get_user_session_key(request)
+    except KeyError:
+        return auth.get_user(request)
+    session_hash = request.session.get(HASH_SESSION_KEY)
+
+    entry = _users.get(user_id)
+    if entry is not None and session_hash:
+        cached_hash, expires, user = entry
+        if cached_hash == session_hash and expires > time.monotonic():
+            # A private copy: views are free to modify request.user.
+            return copy.deepcopy(user)
+
+    user = auth.get_user(request)
+    if timeout and user.is_authenticated and session_hash == request.session.get(HASH_SESSION_KEY):
+        with _lock:
+            if len(_users) >= MAX_CACHED_USERS:
+                _users.clear()
+            _users[user.pk] = (session_hash, time.monotonic() + timeout, copy.deepcopy(user))
+    return user
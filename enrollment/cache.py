@@ -0,0 +1,293 @@
+"""
+Versioned caching for the course catalog.
+
+Rendered course cards are cached under a per-course version, and the course ids
+behind each catalog filter/page under a catalog-wide generation. Saving or
+deleting a course bumps both; enrollment changes only bump the course they
+touch, so a seat change re-renders one card and leaves every cached filter
+result alone. Old entries are never deleted, they just stop being addressed.
+
+Catalog facets (courses and open seats per semester and credits) are cached
+under their own generation, which both kinds of change bump.
+
+Versions are bumped immediately and again once the transaction commits, so a
+reader that cached pre-commit data under the new version is superseded.
+
+Card fragments carry no per-user state; views compose badges like "Enrolled"
+around them, so one cached card serves every student.
+
+The same versions make the validators for conditional GETs (``Freshness``).
+A page's ETag joins the versions of everything it shows. Its Last-Modified
+is the latest ``Course.updated_at`` among its courses and the time each
+generation it depends on was first seen, so neither needs a render.
+"""
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from .feed import course_changed
+from .models import Course
+from .pagination import KeysetPage
+
+CARD_TEMPLATE = "enrollment/_course_card.html"
+CARD_TIMEOUT = 60 * 60
+PAGE_IDS_TIMEOUT = 10 * 60
+COURSE_TIMEOUT = 60 * 60
+FACETS_TIMEOUT = 10 * 60
+MODIFIED_TIMEOUT = 60 * 60
+
+CATALOG_GENERATION_KEY = "catalog:generation"
+FACETS_GENERATION_KEY = "catalog:facets:generation"
+MEETING_TIMES_GENERATION_KEY = "meeting-times:generation"
+PREREQUISITES_GENERATION_KEY = "prerequisites:generation"
+
+
+def _course_version_key(course_id: int) -> str:
+    return f"course:{course_id}:version"
+
+
+def _schedule_version_key(student_id: int) -> str:
+    return f"student:{student_id}:schedule:version"
+
+
+def _completions_version_key(student_id: int) -> str:
+    return f"student:{student_id}:completions:version"
+
+
+def _fresh_version() -> int:
+    # Start from the clock so a version evicted from the cache never reuses an old number.
+    return time.time_ns()
+
+
+def _versions(keys: list) -> dict:
+    versions = cache.get_many(keys)
+    missing = {key: _fresh_version() for key in keys if key not in versions}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        versions.update(cache.get_many(list(missing)))
+    return versions
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def _bump_now_and_on_commit(key: str) -> None:
+    _bump(key)
+    transaction.on_commit(lambda: _bump(key))
+
+
+def catalog_generation() -> int:
+    return _versions([CATALOG_GENERATION_KEY])[CATALOG_GENERATION_KEY]
+
+
+def course_versions(course_ids: Iterable[int]) -> dict:
+    keys = {course_id: _course_version_key(course_id) for course_id in course_ids}
+    versions = _versions(list(keys.values()))
+    return {course_id: versions[key] for course_id, key in keys.items()}
+
+
+def invalidate_course(course_id: int) -> None:
+    """Seat counts or other card content of one course changed."""
+    _bump_now_and_on_commit(_course_version_key(course_id))
+    _bump_now_and_on_commit(FACETS_GENERATION_KEY)
+    course_changed(course_id)
+
+
+def invalidate_catalog() -> None:
+    """Courses were added, removed or edited; filter results may differ."""
+    _bump_now_and_on_commit(CATALOG_GENERATION_KEY)
+    _bump_now_and_on_commit(FACETS_GENERATION_KEY)
+
+
+def invalidate_schedule(student_id: int) -> None:
+    """The student's enrollments changed."""
+    _bump_now_and_on_commit(_schedule_version_key(student_id))
+
+
+def invalidate_meeting_times() -> None:
+    """Some course's meeting times changed; every cached slot list and schedule is stale."""
+    _bump_now_and_on_commit(MEETING_TIMES_GENERATION_KEY)
+
+
+def schedule_version(student_id: int = None) -> str:
+    """
+    Version for cached meeting data: of one student's schedule, or of course slots if ``student_id`` is None.
+
+    It also moves with the catalog generation, since a course can change semester.
+    """
+    keys = [CATALOG_GENERATION_KEY, MEETING_TIMES_GENERATION_KEY]
+    if student_id is not None:
+        keys.append(_schedule_version_key(student_id))
+    versions = _versions(keys)
+    return ".".join(str(versions[key]) for key in keys)
+
+
+def completions_version(student_id: int) -> int:
+    key = _completions_version_key(student_id)
+    return _versions([key])[key]
+
+
+def invalidate_completions(student_id: int) -> None:
+    """The student passed (or lost credit for) a course."""
+    _bump_now_and_on_commit(_completions_version_key(student_id))
+
+
+def prerequisites_version() -> int:
+    return _versions([PREREQUISITES_GENERATION_KEY])[PREREQUISITES_GENERATION_KEY]
+
+
+def bump_prerequisites_version() -> int:
+    """Mark every process's prerequisite graph stale; returns the new version."""
+    try:
+        return cache.incr(PREREQUISITES_GENERATION_KEY)
+    except ValueError:
+        version = _fresh_version()
+        cache.set(PREREQUISITES_GENERATION_KEY, version, timeout=None)
+        return version
+
+
+def _first_seen(keys: list) -> list:
+    """
+    When each version in ``keys`` was first read, as a stand-in for when it changed.
+
+    A version is bumped before anyone reads it, so this is never earlier than the
+    change itself. An evicted entry only moves later, which costs a full response.
+    """
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        now = datetime.now(timezone.utc)
+        for key in missing:
+            cache.add(key, now, timeout=MODIFIED_TIMEOUT)
+        found.update(cache.get_many(missing))
+    return [found[key] for key in keys if key in found]
+
+
+def course_modified(course_ids: list, versions: dict = None) -> dict:
+    """``{course_id: updated_at}`` for the existing courses in ``course_ids``, cached per course version."""
+    versions = versions or course_versions(course_ids)
+    keys = {course_id: f"course:{course_id}:modified:{versions[course_id]}" for course_id in course_ids}
+    found = cache.get_many(list(keys.values()))
+
+    missing = [course_id for course_id, key in keys.items() if key not in found]
+    if missing:
+        loaded = {keys[pk]: updated_at for pk, updated_at in Course.objects.filter(pk__in=missing).values_list("pk", "updated_at")}
+        cache.set_many(loaded, timeout=MODIFIED_TIMEOUT)
+        found.update(loaded)
+    return {course_id: found[key] for course_id, key in keys.items() if key in found}
+
+
+@dataclass
+class Freshness:
+    """Validators for a page: an opaque version of what it shows and when that last changed."""
+
+    version: str
+    modified: datetime
+
+
+def catalog_freshness(course_ids: list, student_id: int) -> Freshness:
+    """
+    Freshness of a catalog page showing ``course_ids`` to one student.
+
+    The page depends on which courses the filter matched (the catalog
+    generation), on each card, on the catalog-wide facet counts, and on the
+    student's prerequisite standing.
+    """
+    generations = [
+        CATALOG_GENERATION_KEY,
+        FACETS_GENERATION_KEY,
+        PREREQUISITES_GENERATION_KEY,
+        _completions_version_key(student_id),
+    ]
+    keys = {course_id: _course_version_key(course_id) for course_id in course_ids}
+    versions = _versions([*generations, *keys.values()])
+    per_course = {course_id: versions[key] for course_id, key in keys.items()}
+    modified = course_modified(course_ids, per_course)
+    seen = _first_seen([f"{key}:modified:{versions[key]}" for key in generations])
+    return Freshness(
+        ".".join(str(versions[key]) for key in [*generations, *keys.values()]),
+        max([*modified.values(), *seen]),
+    )
+
+
+def course_freshness(course: Course) -> Freshness:
+    """Freshness of a course page; ``course.updated_at`` moves with every edit and seat change."""
+    return Freshness(str(course_versions([course.pk])[course.pk]), course.updated_at)
+
+
+@dataclass
+class CourseCard:
+    pk: int
+    html: str
+
+
+def course_page(filters: dict, cursor: str, params, build: Callable[[], KeysetPage]) -> KeysetPage:
+    """
+    The page of course ids for these cleaned ``filters`` and validated ``cursor``, cached per catalog generation.
+
+    ``build`` runs the filtered, paginated query on a miss; ``params`` are kept for the page links.
+    Other query parameters do not reach the key, and the hash keeps it short whatever was searched.
+    """
+    selected = sorted((name, value) for name, value in filters.items() if value not in ("", None))
+    digest = hashlib.blake2b(repr((selected, cursor)).encode(), digest_size=16).hexdigest()
+    key = f"catalog:{catalog_generation()}:page:{digest}"
+    cached = cache.get(key)
+    if cached is None:
+        page = build()
+        cached = ([course.pk for course in page], page.next_cursor, page.previous_cursor)
+        cache.set(key, cached, timeout=PAGE_IDS_TIMEOUT)
+    ids, next_cursor, previous_cursor = cached
+    return KeysetPage(ids, next_cursor, previous_cursor, params=params)
+
+
+def course_cards(course_ids: list) -> list:
+    """Rendered cards for ``course_ids`` in order; one query for all cache misses."""
+    versions = course_versions(course_ids)
+    keys = {course_id: f"course:{course_id}:card:{versions[course_id]}" for course_id in course_ids}
+    found = cache.get_many(list(keys.values()))
+
+    missing = [course_id for course_id, key in keys.items() if key not in found]
+    if missing:
+        rendered = {}
+        for course in Course.objects.with_seat_counts().filter(pk__in=missing):
+            rendered[keys[course.pk]] = render_to_string(CARD_TEMPLATE, {"course": course})
+        cache.set_many(rendered, timeout=CARD_TIMEOUT)
+        found.update(rendered)
+
+    # Ids of courses deleted since the page was cached simply drop out.
+    return [CourseCard(course_id, mark_safe(found[keys[course_id]])) for course_id in course_ids if keys[course_id] in found]
+
+
+def cached_course(course_id: int) -> Course:
+    """The course with seat counts, cached per course version; raises ``Course.DoesNotExist``."""
+    key = f"course:{course_id}:object:{course_versions([course_id])[course_id]}"
+    course = cache.get(key)
+    if course is None:
+        course = Course.objects.with_seat_counts().prefetch_related("meeting_times").get(pk=course_id)
+        cache.set(key, course, timeout=COURSE_TIMEOUT)
+    return course
+
+
+def catalog_facets() -> list:
+    """``(semester, credits, courses, open_seats)`` for the whole catalog, cached until any course changes."""
+    key = f"catalog:facets:{_versions([FACETS_GENERATION_KEY])[FACETS_GENERATION_KEY]}"
+    rows = cache.get(key)
+    if rows is None:
+        rows = [
+            (row["semester"], row["credits"], row["courses"], row["open_seats"])
+            for row in Course.objects.facet_counts()
+        ]
+        cache.set(key, rows, timeout=FACETS_TIMEOUT)
+    return rows
@@ -0,0 +1,162 @@
+"""
+In-process change feed for live seat counts.
+
+Every change that moves a course's seat numbers already goes through
+``cache.invalidate_course``, which hands the course id to ``course_changed``.
+If anyone in this process watches that course, the new counts are read once
+after the transaction commits and fanned out to all of its watchers, so an idle
+watcher costs one dict entry and a parked coroutine, not a query.
+
+Publishers run in request threads; each watcher lives on an event loop, so
+deliveries are handed over with ``call_soon_threadsafe``. Pending updates are
+coalesced per course and a watcher only ever sees the latest counts.
+
+The feed only hears about changes made in this process, so every
+``RESYNC_SECONDS`` it re-reads all watched courses in one query and publishes
+whatever moved, which picks up changes made by other workers.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, Optional
+
+from django.db import DatabaseError, transaction
+
+from .models import Course
+
+RESYNC_SECONDS = 15
+
+logger = logging.getLogger(__name__)
+
+_SNAPSHOT_FIELDS = {
+    "id": "pk",
+    "capacity": "capacity",
+    "enrolled": "enrolled_count",
+    "seats_remaining": "open_seats",
+    "waitlist": "waitlist_count",
+}
+
+
+def _snapshot_queryset(course_ids: Iterable[int]):
+    return Course.objects.with_seat_counts().filter(pk__in=list(course_ids)).values(*_SNAPSHOT_FIELDS.values())
+
+
+def _to_snapshot(row: dict) -> dict:
+    return {name: row[lookup] for name, lookup in _SNAPSHOT_FIELDS.items()}
+
+
+def seat_snapshots(course_ids: Iterable[int]) -> dict:
+    """Current seat counts keyed by course id, in one query."""
+    return {row["pk"]: _to_snapshot(row) for row in _snapshot_queryset(course_ids)}
+
+
+async def aseat_snapshots(course_ids: Iterable[int]) -> dict:
+    return {row["pk"]: _to_snapshot(row) async for row in _snapshot_queryset(course_ids)}
+
+
+class Watcher:
+    """One subscriber's view of the feed; use from the event loop that created it."""
+
+    def __init__(self, course_ids: Iterable[int]):
+        self.course_ids = frozenset(course_ids)
+        self._loop = asyncio.get_running_loop()
+        self._pending = {}
+        self._ready = asyncio.Event()
+
+    def _deliver(self, snapshot: dict) -> None:
+        self._pending[snapshot["id"]] = snapshot
+        self._ready.set()
+
+    async def changes(self, timeout: Optional[float] = None) -> dict:
+        """Wait for updates; returns ``{course_id: snapshot}``, or ``{}`` on timeout."""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return {}
+        pending, self._pending = self._pending, {}
+        self._ready.clear()
+        return pending
+
+
+class SeatFeed:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._watchers = defaultdict(set)
+        self._latest = {}
+        self._resync_tasks = {}
+
+    def watch(self, course_ids: Iterable[int]) -> Watcher:
+        watcher = Watcher(course_ids)
+        with self._lock:
+            for course_id in watcher.course_ids:
+                self._watchers[course_id].add(watcher)
+            task = self._resync_tasks.get(watcher._loop)
+            if task is None or task.done():
+                self._resync_tasks[watcher._loop] = watcher._loop.create_task(self._resync_forever())
+        return watcher
+
+    def unwatch(self, watcher: Watcher) -> None:
+        """Stop delivering to ``watcher``; safe to call more than once."""
+        with self._lock:
+            for course_id in watcher.course_ids:
+                watchers = self._watchers.get(course_id)
+                if watchers is not None:
+                    watchers.discard(watcher)
+                    if not watchers:
+                        del self._watchers[course_id]
+                        self._latest.pop(course_id, None)
+            if not self._watchers:
+                for loop, task in self._resync_tasks.items():
+                    if not loop.is_closed():
+                        loop.call_soon_threadsafe(task.cancel)
+                self._resync_tasks.clear()
+
+    def is_watched(self, course_id: int) -> bool:
+        return course_id in self._watchers
+
+    def publish(self, snapshot: dict) -> None:
+        with self._lock:
+            if snapshot["id"] in self._watchers:
+                self._latest[snapshot["id"]] = snapshot
+            watchers = list(self._watchers.get(snapshot["id"], ()))
+        for watcher in watchers:
+            try:
+                watcher._loop.call_soon_threadsafe(watcher._deliver, snapshot)
+            except RuntimeError:
+                # The watcher's loop closed without unwatching.
+                self.unwatch(watcher)
+
+    async def resync(self) -> None:
+        """Re-read every watched course in one query and publish what changed."""
+        with self._lock:
+            course_ids = list(self._watchers)
+        if not course_ids:
+            return
+        for course_id, snapshot in (await aseat_snapshots(course_ids)).items():
+            if self._latest.get(course_id) != snapshot:
+                self.publish(snapshot)
+
+    async def _resync_forever(self) -> None:
+        while True:
+            await asyncio.sleep(RESYNC_SECONDS)
+            try:
+                await self.resync()
+            except DatabaseError:
+                logger.exception("Seat feed resync failed")
+
+
+seat_feed = SeatFeed()
+
+
+def _publish(course_id: int) -> None:
+    snapshot = seat_snapshots([course_id]).get(course_id)
+    if snapshot is not None:
+        seat_feed.publish(snapshot)
+
+
+def course_changed(course_id: int) -> None:
+    """Push ``course_id``'s seat counts to its watchers once the transaction commits."""
+    if seat_feed.is_watched(course_id):
+        transaction.on_commit(lambda: _publish(course_id))
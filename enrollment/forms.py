@@ -1,6 +1,9 @@
+from dataclasses import dataclass
+
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.models import User
+from django.template.defaultfilters import pluralize
 
 from .models import Course
 
@@ -60,11 +63,48 @@ class StudentSignUpForm(UserCreationForm):
         return password2
 
 
+@dataclass
+class Facet:
+    value: object
+    courses: int = 0
+    open_seats: int = 0
+
+
+def facet_options(rows: list, semester: str = "", credits=None) -> dict:
+    """
+    Per-value course and open-seat counts for the semester and credits facets.
+
+    ``rows`` are ``(semester, credits, courses, open_seats)`` groups. Each facet
+    is counted within the selection made in the other one, so picking a
+    semester shows how many of its courses carry each credit value.
+    """
+    semesters, credit_values = {}, {}
+    for row_semester, row_credits, courses, open_seats in rows:
+        for facets, value, counted in (
+            (semesters, row_semester, credits is None or row_credits == credits),
+            (credit_values, row_credits, not semester or row_semester == semester),
+        ):
+            if counted:
+                facet = facets.setdefault(value, Facet(value))
+                facet.courses += courses
+                facet.open_seats += open_seats
+    return {
+        "semester": sorted(semesters.values(), key=lambda facet: facet.value),
+        "credits": sorted(credit_values.values(), key=lambda facet: facet.value),
+    }
+
+
 class CourseFilterForm(forms.Form):
     semester = forms.CharField(
         required=False,
         label="Semester",
-        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "e.g. Fall 2025"}),
+        widget=forms.Select(attrs={"class": "form-select"}),
+    )
+    credits = forms.IntegerField(
+        required=False,
+        min_value=0,
+        label="Credits",
+        widget=forms.Select(attrs={"class": "form-select"}),
     )
     search = forms.CharField(
         required=False,
@@ -72,6 +112,27 @@ class CourseFilterForm(forms.Form):
         widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Code, title, or description"}),
     )
 
+    def selected_facets(self) -> dict:
+        if not self.is_valid():
+            return {}
+        return {"semester": self.cleaned_data["semester"], "credits": self.cleaned_data["credits"]}
+
+    def set_facets(self, facets: dict) -> None:
+        """Offer ``facet_options`` results, with their counts, as the semester and credits choices."""
+
+        def label(name, facet: Facet) -> str:
+            return (
+                f"{name} ({facet.courses} course{pluralize(facet.courses)}, "
+                f"{facet.open_seats} open seat{pluralize(facet.open_seats)})"
+            )
+
+        self.fields["semester"].widget.choices = [("", "All semesters")] + [
+            (facet.value, label(facet.value, facet)) for facet in facets["semester"]
+        ]
+        self.fields["credits"].widget.choices = [("", "Any credits")] + [
+            (facet.value, label(f"{facet.value} credit{pluralize(facet.value)}", facet)) for facet in facets["credits"]
+        ]
+
 
 class CourseForm(forms.ModelForm):
     class Meta:
@@ -85,3 +146,66 @@ class CourseForm(forms.ModelForm):
             "credits": forms.NumberInput(attrs={"class": "form-control", "min": 0}),
             "capacity": forms.NumberInput(attrs={"class": "form-control", "min": 0}),
         }
+
+
+class CourseImportForm(CourseForm):
+    """
+    CourseForm's field rules for bulk imports.
+
+    Rows are upserted on (code, semester) in batches, so the per-row uniqueness
+    queries a ModelForm would normally run are skipped.
+    """
+
+    def validate_unique(self):
+        pass
+
+
+class BulkEnrollForm(forms.Form):
+    students = forms.CharField(
+        label="Students",
+        help_text="Usernames, separated by spaces, commas or new lines.",
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 6, "placeholder": "alice, bob"}),
+    )
+    courses = forms.CharField(
+        label="Courses",
+        help_text="Course codes, separated by spaces, commas or new lines.",
+        widget=forms.Textarea(attrs={"class": "form-control", "rows": 3, "placeholder": "CS101 MATH201"}),
+    )
+    semester = forms.CharField(
+        required=False,
+        label="Semester",
+        help_text="Required when a code is offered in more than one semester.",
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "Fall 2025"}),
+    )
+
+    @staticmethod
+    def _split(value: str) -> list:
+        # Keep first-seen order: seats are handed out in it.
+        return list(dict.fromkeys(value.replace(",", " ").split()))
+
+    def clean_students(self):
+        usernames = self._split(self.cleaned_data["students"])
+        found = dict(User.objects.filter(username__in=usernames).values_list("username", "pk"))
+        unknown = [name for name in usernames if name not in found]
+        if unknown:
+            raise forms.ValidationError(f"Unknown students: {', '.join(unknown)}")
+        return [found[name] for name in usernames]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        codes = self._split(cleaned_data.get("courses", ""))
+        courses = Course.objects.filter(code__in=codes)
+        if cleaned_data.get("semester"):
+            courses = courses.filter(semester=cleaned_data["semester"])
+        by_code = {}
+        for pk, code in courses.values_list("pk", "code"):
+            by_code.setdefault(code, []).append(pk)
+        unknown = [code for code in codes if code not in by_code]
+        ambiguous = [code for code in codes if len(by_code.get(code, ())) > 1]
+        if unknown:
+            self.add_error("courses", f"Unknown courses: {', '.join(unknown)}")
+        if ambiguous:
+            self.add_error("semester", f"Pick a semester for: {', '.join(ambiguous)}")
+        if not (unknown or ambiguous):
+            cleaned_data["courses"] = [by_code[code][0] for code in codes]
+        return cleaned_data
@@ -0,0 +1,260 @@
+import json
+import math
+import random
+import subprocess
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from enrollment import metrics
+from enrollment.cache import invalidate_catalog
+from enrollment.models import Course, Enrollment, Waitlist
+
+CODE_PREFIX = "BN"
+USERNAME_PREFIX = "bench"
+SEMESTERS = ("Fall 2031", "Spring 2032", "Summer 2032", "Fall 2032")
+WORDS = (
+    "algebra analysis biology chemistry compilers databases design ecology economics "
+    "finance genetics geometry graphics history linguistics logic networks optics "
+    "parsing physics robotics security statistics systems theory topology writing"
+).split()
+BATCH_SIZE = 5000
+# Free seats left on every synthetic course, so enroll_course has room.
+HEADROOM = 50
+
+
+def _batches(rows, size: int = BATCH_SIZE):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _percentile(samples: list, percent: float) -> float:
+    """Nearest-rank percentile of sorted ``samples``."""
+    return samples[max(math.ceil(len(samples) * percent / 100) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a reproducible synthetic catalog (stage 1), then time the main views through the "
+        "test client (stage 2) and print p50/p95/p99 and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=20_000, help="Synthetic courses.")
+        parser.add_argument("--students", type=int, default=200_000, help="Synthetic students.")
+        parser.add_argument("--enrollments", type=int, default=2_000_000, help="Synthetic enrollments.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for data and request mix.")
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per scenario first.")
+        parser.add_argument("--clients", type=int, default=20, help="Logged-in students to browse as.")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+        stage = parser.add_mutually_exclusive_group()
+        stage.add_argument("--generate-only", action="store_true", help="Build the dataset and stop.")
+        stage.add_argument("--skip-generate", action="store_true", help="Time the dataset already built.")
+        stage.add_argument("--clean", action="store_true", help="Delete the synthetic dataset and stop.")
+
+    def handle(self, *args, **options):
+        if options["clean"]:
+            self._clean()
+            return
+        existing = self._bench_courses().count()
+        if options["skip_generate"]:
+            if not existing:
+                raise CommandError("No synthetic dataset found; run without --skip-generate first.")
+        elif existing:
+            raise CommandError("A synthetic dataset already exists; pass --skip-generate or --clean.")
+        else:
+            self._generate(options)
+        if options["generate_only"]:
+            return
+
+        report = {
+            "commit": self._commit(),
+            "database": connection.vendor,
+            "dataset": {
+                "courses": self._bench_courses().count(),
+                "students": User.objects.filter(username__startswith=USERNAME_PREFIX).count(),
+                "enrollments": Enrollment.objects.filter(course__code__startswith=CODE_PREFIX).count(),
+                "seed": options["seed"],
+            },
+            "requests": options["requests"],
+            "results": self._run(options),
+        }
+        rendered = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(rendered + "\n")
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(rendered)
+
+    def _bench_courses(self):
+        return Course.objects.filter(code__startswith=CODE_PREFIX)
+
+    # ---- stage 1: dataset ---------------------------------------------------------
+
+    def _generate(self, options):
+        courses, students, enrollments = options["courses"], options["students"], options["enrollments"]
+        if enrollments > courses * students:
+            raise CommandError("More enrollments requested than (student, course) pairs exist.")
+        rng = random.Random(options["seed"])
+        started = time.perf_counter()
+        with transaction.atomic():
+            Course.objects.bulk_create(
+                Course(
+                    code=f"{CODE_PREFIX}{i:05d}",
+                    title=" ".join(rng.sample(WORDS, 3)).title(),
+                    description=" ".join(rng.choices(WORDS, k=8)),
+                    semester=SEMESTERS[i % len(SEMESTERS)],
+                    credits=rng.randint(1, 4),
+                )
+                for i in range(courses)
+            )
+            # One hash for everyone: hashing 200k passwords would dominate the run.
+            password = make_password(None)
+            for batch in _batches(
+                User(username=f"{USERNAME_PREFIX}{i:06d}", password=password) for i in range(students)
+            ):
+                User.objects.bulk_create(batch)
+            self.stderr.write(f"Courses and students: {time.perf_counter() - started:.1f}s")
+
+            course_ids = list(self._bench_courses().order_by("pk").values_list("pk", flat=True))
+            student_ids = list(
+                User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("pk").values_list("pk", flat=True)
+            )
+            for batch in _batches(self._pairs(rng, student_ids, course_ids, enrollments)):
+                # bulk_create skips the counter signals; counts are reconciled below.
+                Enrollment.objects.bulk_create(batch)
+            self._bench_courses().reconcile_counts()
+            self._bench_courses().update(capacity=F("enrolled_count") + HEADROOM)
+        invalidate_catalog()
+        self.stderr.write(
+            f"Generated {courses} courses, {students} students, {enrollments} enrollments "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def _pairs(self, rng: random.Random, student_ids: list, course_ids: list, total: int):
+        """``total`` distinct enrollments, spread as evenly as possible across students."""
+        per_student, extra = divmod(total, len(student_ids))
+        for index, student_id in enumerate(student_ids):
+            for course_id in rng.sample(course_ids, per_student + (index < extra)):
+                yield Enrollment(student_id=student_id, course_id=course_id)
+
+    def _clean(self):
+        courses = self._bench_courses()
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Straight DELETEs: the ORM would load millions of rows to send their signals.
+            for model in (Enrollment, Waitlist):
+                cursor.execute(
+                    f"DELETE FROM {model._meta.db_table} WHERE course_id IN "
+                    f"(SELECT id FROM {Course._meta.db_table} WHERE code LIKE %s)",
+                    [f"{CODE_PREFIX}%"],
+                )
+            deleted_courses, _ = courses.delete()
+            deleted_users, _ = User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+        invalidate_catalog()
+        self.stderr.write(f"Removed the synthetic dataset ({deleted_courses + deleted_users} rows).")
+
+    # ---- stage 2: timings ---------------------------------------------------------
+
+    # A handful of clients posting back to back would spend most of the run in the
+    # waiting room; this measures the views themselves, so admission control is off.
+    @override_settings(ADMISSION_LIMITS=None, ADMISSION_WINDOWS=[])
+    def _run(self, options) -> dict:
+        rng = random.Random(options["seed"])
+        course_ids = list(self._bench_courses().values_list("pk", flat=True))
+        students = list(
+            User.objects.filter(username__startswith=USERNAME_PREFIX).order_by("pk").values_list("pk", flat=True)
+        )
+        clients = []
+        for student in User.objects.filter(pk__in=rng.sample(students, min(options["clients"], len(students)))).order_by("pk"):
+            client = Client()
+            client.force_login(student)
+            clients.append((student, client))
+
+        total = options["warmup"] + options["requests"]
+        detail_urls = [reverse("course_detail", kwargs={"pk": pk}) for pk in rng.choices(course_ids, k=total)]
+        word = rng.choice(WORDS)
+        filters = {"semester": SEMESTERS[0], "search": word}
+
+        # (student, course) pairs that are not enrolled yet, so enroll then drop leaves the data as it was.
+        pairs, chosen = [], set()
+        while len(pairs) < total:
+            student, client = clients[len(pairs) % len(clients)]
+            course_id = rng.choice(course_ids)
+            if (student.pk, course_id) in chosen:
+                continue
+            if not Enrollment.objects.filter(student=student, course_id=course_id).exists():
+                chosen.add((student.pk, course_id))
+                pairs.append((student, client, course_id))
+
+        scenarios = [
+            ("course_list", "course_list", lambda i: clients[i % len(clients)][1].get(reverse("course_list"))),
+            (
+                "course_list_filtered",
+                "course_list",
+                lambda i: clients[i % len(clients)][1].get(reverse("course_list"), filters),
+            ),
+            ("course_detail", "course_detail", lambda i: clients[i % len(clients)][1].get(detail_urls[i])),
+            (
+                "enroll_course",
+                "enroll_course",
+                lambda i: pairs[i][1].post(reverse("enroll_course", kwargs={"pk": pairs[i][2]})),
+            ),
+            (
+                "drop_course",
+                "drop_course",
+                lambda i: pairs[i][1].post(reverse("drop_course", kwargs={"pk": pairs[i][2]})),
+            ),
+            ("my_courses", "my_courses", lambda i: clients[i % len(clients)][1].get(reverse("my_courses"))),
+        ]
+        results = {}
+        for name, view, request in scenarios:
+            for i in range(options["warmup"]):
+                self._check(name, request(i))
+            before = metrics.snapshot().get(view)
+            samples = []
+            for i in range(options["warmup"], total):
+                start = time.perf_counter()
+                response = request(i)
+                samples.append((time.perf_counter() - start) * 1000)
+                self._check(name, response)
+            after = metrics.snapshot()[view]
+            queries = after.queries - (before.queries if before else 0)
+            samples.sort()
+            results[name] = {
+                "p50_ms": round(_percentile(samples, 50), 3),
+                "p95_ms": round(_percentile(samples, 95), 3),
+                "p99_ms": round(_percentile(samples, 99), 3),
+                "mean_ms": round(sum(samples) / len(samples), 3),
+                "queries_per_request": round(queries / len(samples), 2),
+            }
+            self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms")
+        for _, client in clients:
+            client.logout()
+        return results
+
+    def _check(self, name: str, response) -> None:
+        if response.status_code not in (200, 302):
+            raise CommandError(f"{name} returned {response.status_code}")
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                cwd=settings.BASE_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,108 @@
+import random
+import statistics
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection, connections
+
+from enrollment.models import Course, Enrollment
+from enrollment.services import drop_student, enroll_student
+
+BENCH_PREFIX = "DBBENCH"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mixed read/write load from several threads against the configured database, treating "
+        "each operation as one request on its own thread, as WSGI does (connections are recycled "
+        "per CONN_MAX_AGE). Run once with SQLITE_TUNING=0 and once with DB_CONN_MAX_AGE=60 to "
+        "compare profiles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16, help="Concurrent workers.")
+        parser.add_argument("--seconds", type=float, default=5.0, help="How long to run.")
+        parser.add_argument("--write-share", type=float, default=0.1, help="Fraction of operations that enroll/drop.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed.")
+
+    def handle(self, *args, **options):
+        threads = options["threads"]
+        courses = Course.objects.bulk_create(
+            Course(code=f"{BENCH_PREFIX}{i:03d}", title="Benchmark", semester="Bench", capacity=10**6)
+            for i in range(20)
+        )
+        students = User.objects.bulk_create(User(username=f"{BENCH_PREFIX.lower()}{i}") for i in range(threads))
+        course_ids = [course.pk for course in courses]
+        results = {"read": [], "write": [], "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options["seconds"]
+
+        def worker(student, seed):
+            rng = random.Random(seed)
+            enrolled = set()
+            reads, writes, errors = [], [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    start = time.perf_counter()
+                    try:
+                        if rng.random() < options["write_share"]:
+                            course_id = rng.choice(course_ids)
+                            if course_id in enrolled:
+                                drop_student(student, course_id)
+                                enrolled.discard(course_id)
+                            else:
+                                enroll_student(student, course_id)
+                                enrolled.add(course_id)
+                            writes.append(time.perf_counter() - start)
+                        else:
+                            list(Course.objects.with_seat_counts().order_by("code", "pk")[:24])
+                            list(Enrollment.objects.filter(student=student).values_list("course_id", flat=True))
+                            reads.append(time.perf_counter() - start)
+                    except DatabaseError:
+                        errors += 1
+                    # What request_finished does at the end of every request.
+                    close_old_connections()
+            finally:
+                connections.close_all()
+                with lock:
+                    results["read"] += reads
+                    results["write"] += writes
+                    results["errors"] += errors
+
+        workers = [
+            threading.Thread(target=worker, args=(student, options["seed"] + i)) for i, student in enumerate(students)
+        ]
+        try:
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+        finally:
+            Course.objects.filter(pk__in=course_ids).delete()
+            User.objects.filter(pk__in=[student.pk for student in students]).delete()
+
+        self.stdout.write(self._profile())
+        for kind in ("read", "write"):
+            samples = sorted(results[kind])
+            if not samples:
+                continue
+            self.stdout.write(
+                f"{kind:>5}: {len(samples) / options['seconds']:8.1f} ops/s   "
+                f"p50 {statistics.median(samples) * 1000:7.2f} ms   "
+                f"p95 {samples[int(len(samples) * 0.95) - 1] * 1000:7.2f} ms"
+            )
+        self.stdout.write(f"errors: {results['errors']}")
+
+    def _profile(self) -> str:
+        db = settings.DATABASES["default"]
+        parts = [connection.vendor, f"CONN_MAX_AGE={db['CONN_MAX_AGE']}"]
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode")
+                parts.append(f"journal_mode={cursor.fetchone()[0]}")
+                cursor.execute("PRAGMA synchronous")
+                parts.append(f"synchronous={cursor.fetchone()[0]}")
+        return ", ".join(parts)
@@ -0,0 +1,68 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from enrollment.models import Course
+from enrollment.search import fts_enabled, install_course_search, search_courses
+
+WORDS = (
+    "algebra analysis biology chemistry compilers databases design ecology economics "
+    "finance genetics geometry graphics history linguistics logic networks optics "
+    "parsing physics robotics security statistics systems theory topology writing"
+).split()
+
+
+class Command(BaseCommand):
+    help = "Compare FTS5 course search with the icontains scan on a synthetic catalog (rolled back)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--courses", type=int, default=50_000, help="Synthetic courses to insert.")
+        parser.add_argument("--repeat", type=int, default=20, help="Timed runs per search term.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic catalog.")
+
+    def handle(self, *args, **options):
+        install_course_search()
+        if not fts_enabled():
+            self.stderr.write("FTS5 is not available on this database; only the fallback path exists.")
+            return
+
+        rng = random.Random(options["seed"])
+        terms = ["robotics", "graph", "XB01234", "quantum"]
+        with transaction.atomic():
+            Course.objects.bulk_create(
+                (
+                    Course(
+                        code=f"XB{i:05d}",
+                        title=" ".join(rng.sample(WORDS, 3)).title(),
+                        description=" ".join(rng.choices(WORDS, k=8)),
+                        semester=rng.choice(["Fall 2025", "Spring 2026"]),
+                        capacity=30,
+                    )
+                    for i in range(options["courses"])
+                ),
+                batch_size=2000,
+            )
+            for term in terms:
+                like = Course.objects.filter(
+                    Q(code__icontains=term) | Q(title__icontains=term) | Q(description__icontains=term)
+                )
+                fts = search_courses(Course.objects.all(), term)
+                like_ms = self._time(lambda: list(like.values_list("pk", flat=True)), options["repeat"])
+                fts_ms = self._time(lambda: list(fts.values_list("pk", flat=True)), options["repeat"])
+                self.stdout.write(
+                    f"{term!r:>10}: icontains {like_ms:8.2f} ms   fts5 {fts_ms:8.2f} ms   "
+                    f"({like.count()} matches)"
+                )
+            transaction.set_rollback(True)
+
+    def _time(self, run, repeat: int) -> float:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from enrollment.models import Course, Enrollment
+
+BENCH_USERNAME = "bench-views"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure requests/sec of the catalog views at several concurrency levels, through the "
+        "WSGI handler (a thread per in-flight request) and the ASGI handler (one event loop)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per view and concurrency level.")
+        parser.add_argument(
+            "--concurrency", default="1,16,64,256", help="Comma-separated in-flight request counts to try."
+        )
+        parser.add_argument(
+            "--username", help=f"Existing user to browse as; defaults to a throwaway '{BENCH_USERNAME}' user."
+        )
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options["concurrency"].split(",")]
+        course = Course.objects.order_by("pk").first()
+        if course is None:
+            raise CommandError("The catalog is empty; seed or import some courses first.")
+
+        created = False
+        if options["username"]:
+            user = User.objects.filter(username=options["username"]).first()
+            if user is None:
+                raise CommandError(f"No user named {options['username']!r}.")
+        else:
+            user, created = User.objects.get_or_create(username=BENCH_USERNAME)
+            Enrollment.objects.get_or_create(student=user, course=course)
+
+        urls = {
+            "course_list": reverse("course_list"),
+            "course_detail": reverse("course_detail", kwargs={"pk": course.pk}),
+            "my_courses": reverse("my_courses"),
+        }
+        wsgi = Client()
+        wsgi.force_login(user)
+        cookies = wsgi.cookies
+        try:
+            self.stdout.write(f"{'view':<15}{'in flight':>10}{'wsgi req/s':>14}{'asgi req/s':>14}")
+            for name, url in urls.items():
+                for level in levels:
+                    wsgi_rps = self._run_wsgi(url, cookies, options["requests"], level)
+                    asgi_rps = asyncio.run(self._run_asgi(url, cookies, options["requests"], level))
+                    self.stdout.write(f"{name:<15}{level:>10}{wsgi_rps:>14.1f}{asgi_rps:>14.1f}")
+        finally:
+            wsgi.logout()
+            if created:
+                user.delete()
+
+    def _run_wsgi(self, url: str, cookies, total: int, concurrency: int) -> float:
+        def worker(count: int):
+            client = Client()
+            client.cookies = cookies
+            try:
+                for _ in range(count):
+                    self._check(client.get(url))
+            finally:
+                close_old_connections()
+
+        shares = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(worker, shares))
+        return total / (time.perf_counter() - start)
+
+    async def _run_asgi(self, url: str, cookies, total: int, concurrency: int) -> float:
+        client = AsyncClient()
+        client.cookies = cookies
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                self._check(await client.get(url))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - start)
+
+    def _check(self, response):
+        if response.status_code != 200:
+            raise CommandError(f"{response.request['PATH_INFO']} returned {response.status_code}")
@@ -0,0 +1,50 @@
+from collections import Counter
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollment.forms import BulkEnrollForm
+from enrollment.models import Course
+from enrollment.services import EnrollOutcome, bulk_enroll
+
+
+class Command(BaseCommand):
+    help = "Enroll a cohort of students into one or more courses in a single transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--students", nargs="*", default=[], help="Usernames to enroll.")
+        parser.add_argument(
+            "--students-file",
+            help="File of usernames (whitespace or comma separated), added after --students.",
+        )
+        parser.add_argument("--courses", nargs="+", required=True, help="Course codes to enroll into.")
+        parser.add_argument("--semester", default="", help="Semester, when a code is offered in several.")
+        parser.add_argument("--verbose-results", action="store_true", help="Print one line per student/course pair.")
+
+    def handle(self, *args, **options):
+        students = list(options["students"])
+        if options["students_file"]:
+            students.append(Path(options["students_file"]).read_text())
+        form = BulkEnrollForm(
+            {"students": " ".join(students), "courses": " ".join(options["courses"]), "semester": options["semester"]}
+        )
+        if not form.is_valid():
+            errors = "; ".join(f"{field}: {' '.join(messages)}" for field, messages in form.errors.items())
+            raise CommandError(errors)
+
+        results = bulk_enroll(form.cleaned_data["students"], form.cleaned_data["courses"])
+        if options["verbose_results"]:
+            usernames = dict(User.objects.filter(pk__in=form.cleaned_data["students"]).values_list("pk", "username"))
+            codes = dict(Course.objects.filter(pk__in=form.cleaned_data["courses"]).values_list("pk", "code"))
+            for pair in results:
+                self.stdout.write(f"{usernames[pair.student_id]} {codes[pair.course_id]}: {pair.outcome.value}")
+
+        summary = Counter(pair.outcome for pair in results)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Bulk enroll: {summary[EnrollOutcome.ENROLLED]} enrolled, "
+                f"{summary[EnrollOutcome.ALREADY_ENROLLED]} already enrolled, "
+                f"{summary[EnrollOutcome.FULL]} full."
+            )
+        )
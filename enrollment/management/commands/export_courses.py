@@ -0,0 +1,50 @@
+import csv
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from enrollment.forms import CourseImportForm
+from enrollment.models import Course
+
+FIELDS = CourseImportForm.Meta.fields
+
+
+class Command(BaseCommand):
+    help = "Stream every course to CSV or JSONL in a form import_courses can read back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", nargs="?", default="-", help="Output file, or '-' (default) for stdout.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        rows = (
+            Course.objects.order_by("code", "semester", "pk")
+            .values_list(*FIELDS)
+            .iterator(chunk_size=options["chunk_size"])
+        )
+        if path == "-":
+            count = self._write(self.stdout, fmt, rows)
+        else:
+            try:
+                stream = Path(path).open("w", newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}")
+            with stream:
+                count = self._write(stream, fmt, rows)
+        self.stderr.write(f"Exported {count} course(s).")
+
+    def _write(self, stream, fmt: str, rows) -> int:
+        count = 0
+        if fmt == "csv":
+            writer = csv.writer(stream)
+            writer.writerow(FIELDS)
+            for count, row in enumerate(rows, start=1):
+                writer.writerow(row)
+        else:
+            for count, row in enumerate(rows, start=1):
+                stream.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+        return count
@@ -0,0 +1,125 @@
+import csv
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from enrollment.cache import invalidate_catalog, invalidate_course
+from enrollment.forms import CourseImportForm
+from enrollment.models import Course
+from enrollment.services import promote_waitlist
+
+FIELDS = CourseImportForm.Meta.fields
+UPDATE_FIELDS = [field for field in FIELDS if field not in ("code", "semester")]
+
+
+def read_rows(stream, fmt: str):
+    """Yield ``(line_number, row)`` pairs one at a time; malformed lines yield an error string."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_number, f"invalid JSON: {exc}"
+            continue
+        yield line_number, row if isinstance(row, dict) else "expected a JSON object"
+
+
+class Command(BaseCommand):
+    help = "Stream courses from CSV or JSONL, validate them with the course form rules and upsert on (code, semester)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or '-' for stdin.")
+        parser.add_argument("--format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing any rows.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or ("jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv")
+        self.dry_run = options["dry_run"]
+        self.created = self.updated = self.errors = 0
+
+        if path == "-":
+            self._import(sys.stdin, fmt, options["batch_size"])
+        else:
+            try:
+                stream = Path(path).open(newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}")
+            with stream:
+                self._import(stream, fmt, options["batch_size"])
+
+        if (self.created or self.updated) and not self.dry_run:
+            invalidate_catalog()
+        summary = f"{self.created} created, {self.updated} updated, {self.errors} rejected"
+        self.stdout.write(f"Dry run: {summary}; nothing written." if self.dry_run else f"Imported: {summary}.")
+
+    def _import(self, stream, fmt: str, batch_size: int) -> None:
+        batch = {}
+        for line_number, row in read_rows(stream, fmt):
+            if isinstance(row, str):
+                self._reject(line_number, row)
+                continue
+            form = CourseImportForm(data={field: row.get(field, "") for field in FIELDS})
+            if not form.is_valid():
+                details = "; ".join(f"{field}: {' '.join(errors)}" for field, errors in form.errors.items())
+                self._reject(line_number, details)
+                continue
+            data = form.cleaned_data
+            # A later row for the same course wins, as it would row by row.
+            batch[(data["code"], data["semester"])] = data
+            if len(batch) >= batch_size:
+                self._flush(batch)
+                batch = {}
+        if batch:
+            self._flush(batch)
+
+    def _reject(self, line_number: int, reason: str) -> None:
+        self.errors += 1
+        self.stderr.write(f"line {line_number}: {reason}")
+
+    def _flush(self, batch: dict) -> None:
+        codes = {code for code, _ in batch}
+        semesters = {semester for _, semester in batch}
+        existing = {}
+        for course in Course.objects.filter(Q(code__in=codes) & Q(semester__in=semesters)).order_by("pk"):
+            existing.setdefault((course.code, course.semester), course)
+
+        to_update, to_create, raised = [], [], []
+        now = timezone.now()
+        for key, data in batch.items():
+            course = existing.get(key)
+            if course is None:
+                to_create.append(Course(**data))
+                continue
+            if data["capacity"] > course.capacity and course.waitlist_count:
+                raised.append(course.pk)
+            # bulk_update skips auto_now; course pages take their Last-Modified from it.
+            if any(getattr(course, field) != data[field] for field in UPDATE_FIELDS):
+                course.updated_at = now
+            for field in UPDATE_FIELDS:
+                setattr(course, field, data[field])
+            to_update.append(course)
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+        if self.dry_run:
+            return
+        with transaction.atomic():
+            Course.objects.bulk_create(to_create)
+            Course.objects.bulk_update(to_update, [*UPDATE_FIELDS, "updated_at"])
+            for course in to_update:
+                invalidate_course(course.pk)
+            for course_id in raised:
+                promote_waitlist(course_id)
@@ -0,0 +1,281 @@
+import http.cookiejar
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.urls import reverse
+
+from enrollment.models import Course, Enrollment, Waitlist
+
+USERNAME_PREFIX = "load"
+CODE_PREFIX = "LOAD"
+SCENARIOS = ("browse", "enroll", "drop")
+# Admission control's waiting room (enrollment.admission).
+SHED_STATUSES = ("429", "503")
+
+
+def _percentile(samples: list, percent: float) -> float:
+    """Nearest-rank percentile of sorted ``samples``."""
+    return samples[max(math.ceil(len(samples) * percent / 100) - 1, 0)]
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report a redirect as the response instead of following it."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+class Student:
+    """One synthetic user: its own cookie jar, so its own session and CSRF token."""
+
+    def __init__(self, base_url: str, username: str, timeout: float):
+        self.base_url = base_url
+        self.username = username
+        self.timeout = timeout
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def _cookie(self, name: str) -> str:
+        return next((cookie.value for cookie in self.cookies if cookie.name == name), "")
+
+    def request(self, method: str, path: str, data: dict = None) -> int:
+        body = urllib.parse.urlencode(data or {}).encode() if method == "POST" else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        if method == "POST":
+            # What a form post from one of our pages sends.
+            req.add_header("X-CSRFToken", self._cookie("csrftoken"))
+            req.add_header("Referer", self.base_url + path)
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+    def login(self, password: str) -> None:
+        path = reverse("login")
+        self.request("GET", path)
+        status = self.request("POST", path, {"username": self.username, "password": password})
+        if status != 302 or not self._cookie("sessionid"):
+            raise CommandError(f"Could not log {self.username} in (HTTP {status}).")
+
+
+class Command(BaseCommand):
+    help = (
+        "Registration-day load test against a running server (runserver, gunicorn, uvicorn...): "
+        "a pool of logged-in synthetic students browse the catalog and enroll in and drop a few "
+        "popular courses at a target arrival rate. Reports throughput, errors and latency "
+        "percentiles as JSON, then checks that no course ended up over capacity."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to load.")
+        parser.add_argument("--users", type=int, default=1000, help="Synthetic students to log in.")
+        parser.add_argument("--password", default="load-test-pass", help="Password of the synthetic students.")
+        parser.add_argument("--courses", type=int, default=5, help="Popular courses everyone competes for.")
+        parser.add_argument("--capacity", type=int, default=50, help="Seats in each popular course.")
+        parser.add_argument("--rate", type=float, default=100.0, help="Target arrivals per second.")
+        parser.add_argument("--duration", type=float, default=60.0, help="Seconds to keep arrivals coming.")
+        parser.add_argument(
+            "--mix", default="browse=60,enroll=30,drop=10", help="Scenario weights, e.g. browse=60,enroll=30,drop=10."
+        )
+        parser.add_argument("--max-in-flight", type=int, default=256, help="Requests outstanding at once.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for arrivals and choices.")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+        parser.add_argument(
+            "--clean", action="store_true", help="Delete the synthetic students and courses, then stop."
+        )
+
+    def handle(self, *args, **options):
+        if options["clean"]:
+            Course.objects.filter(code__startswith=CODE_PREFIX).delete()
+            User.objects.filter(username__startswith=USERNAME_PREFIX).delete()
+            self.stderr.write("Removed the load-test students and courses.")
+            return
+
+        mix = self._parse_mix(options["mix"])
+        course_ids = self._prepare_courses(options["courses"], options["capacity"])
+        usernames = self._prepare_users(options["users"], options["password"])
+        rng = random.Random(options["seed"])
+
+        students = [Student(options["base_url"].rstrip("/"), name, options["timeout"]) for name in usernames]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["max_in_flight"]) as pool:
+            list(pool.map(lambda student: student.login(options["password"]), students))
+        self.stderr.write(f"Logged in {len(students)} students in {time.perf_counter() - started:.1f}s")
+
+        results = self._run(students, course_ids, mix, rng, options)
+        report = {
+            "base_url": options["base_url"],
+            "target_rate": options["rate"],
+            "duration": options["duration"],
+            "users": len(students),
+            "mix": mix,
+            **results,
+            "oversell": self._oversell_check(course_ids),
+        }
+        rendered = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as handle:
+                handle.write(rendered + "\n")
+            self.stderr.write(f"Wrote {options['output']}")
+        else:
+            self.stdout.write(rendered)
+        if not report["oversell"]["ok"]:
+            raise CommandError("Oversell check failed; see the report.")
+
+    def _parse_mix(self, text: str) -> dict:
+        mix = {}
+        for part in filter(None, text.split(",")):
+            name, _, weight = part.partition("=")
+            if name.strip() not in SCENARIOS:
+                raise CommandError(f"Unknown scenario {name.strip()!r}; choose from {', '.join(SCENARIOS)}.")
+            try:
+                mix[name.strip()] = float(weight)
+            except ValueError:
+                raise CommandError(f"Bad weight in {part!r}.")
+        if not mix or sum(mix.values()) <= 0:
+            raise CommandError("The scenario mix needs at least one positive weight.")
+        return mix
+
+    def _prepare_courses(self, count: int, capacity: int) -> list:
+        """Create the popular courses if needed and empty them, so every run starts at zero."""
+        course_ids = []
+        for i in range(count):
+            course, _ = Course.objects.update_or_create(
+                code=f"{CODE_PREFIX}{i:03d}",
+                semester="Registration Day",
+                defaults={"title": f"Popular Course {i + 1}", "capacity": capacity},
+            )
+            course_ids.append(course.pk)
+        Waitlist.objects.filter(course_id__in=course_ids).delete()
+        Enrollment.objects.filter(course_id__in=course_ids).delete()
+        Course.objects.filter(pk__in=course_ids).update_counts(enrolled_count=0, waitlist_count=0)
+        return course_ids
+
+    def _prepare_users(self, count: int, password: str) -> list:
+        usernames = [f"{USERNAME_PREFIX}{i:05d}" for i in range(count)]
+        existing = set(User.objects.filter(username__in=usernames).values_list("username", flat=True))
+        # One hash for everyone: hashing thousands of passwords would take minutes.
+        hashed = make_password(password)
+        User.objects.bulk_create(
+            (User(username=name, password=hashed) for name in usernames if name not in existing), batch_size=1000
+        )
+        User.objects.filter(username__in=existing).update(password=hashed)
+        return usernames
+
+    def _run(self, students: list, course_ids: list, mix: dict, rng: random.Random, options) -> dict:
+        paths = {
+            "browse": [reverse("course_list")],
+            "enroll": [reverse("enroll_course", kwargs={"pk": pk}) for pk in course_ids],
+            "drop": [reverse("drop_course", kwargs={"pk": pk}) for pk in course_ids],
+        }
+        names, weights = list(mix), list(mix.values())
+        samples = {name: [] for name in names}
+        statuses = {name: Counter() for name in names}
+        lock = threading.Lock()
+        gate = threading.BoundedSemaphore(options["max_in_flight"])
+
+        def arrive(name: str, student: Student, path: str, scheduled: float):
+            try:
+                try:
+                    status = student.request("GET" if name == "browse" else "POST", path)
+                except OSError as error:
+                    status = type(error).__name__
+                # Measured from the scheduled arrival, so time spent waiting for a free slot counts.
+                elapsed = (time.perf_counter() - scheduled) * 1000
+                with lock:
+                    samples[name].append(elapsed)
+                    statuses[name][str(status)] += 1
+            finally:
+                gate.release()
+
+        started = time.perf_counter()
+        scheduled = started
+        arrivals = 0
+        with ThreadPoolExecutor(max_workers=options["max_in_flight"]) as pool:
+            while True:
+                # Poisson arrivals: independent users do not wait for each other's responses.
+                scheduled += rng.expovariate(options["rate"])
+                if scheduled - started >= options["duration"]:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                name = rng.choices(names, weights)[0]
+                student, path = rng.choice(students), rng.choice(paths[name])
+                gate.acquire()
+                pool.submit(arrive, name, student, path, scheduled)
+                arrivals += 1
+        elapsed = time.perf_counter() - started
+
+        scenarios = {}
+        completed = errors = shed = 0
+        for name in names:
+            ordered = sorted(samples[name])
+            # Pages and form posts answer 200 or redirect, and admission control turns
+            # excess writes away with 429/503; anything else, or no answer, is an error.
+            turned_away = sum(count for status, count in statuses[name].items() if status in SHED_STATUSES)
+            failed = sum(count for status, count in statuses[name].items() if status not in ("200", "302", *SHED_STATUSES))
+            completed += len(ordered)
+            errors += failed
+            shed += turned_away
+            scenarios[name] = {
+                "requests": len(ordered),
+                "errors": failed,
+                "waiting_room": turned_away,
+                "statuses": dict(statuses[name]),
+                "p50_ms": round(_percentile(ordered, 50), 2) if ordered else None,
+                "p95_ms": round(_percentile(ordered, 95), 2) if ordered else None,
+                "p99_ms": round(_percentile(ordered, 99), 2) if ordered else None,
+            }
+        return {
+            "elapsed": round(elapsed, 2),
+            "arrivals": arrivals,
+            "throughput": round(completed / elapsed, 2),
+            "error_rate": round(errors / completed, 4) if completed else None,
+            "waiting_room_rate": round(shed / completed, 4) if completed else None,
+            "scenarios": scenarios,
+        }
+
+    def _oversell_check(self, course_ids: list) -> dict:
+        courses = (
+            Course.objects.filter(pk__in=course_ids)
+            .annotate(rows=Count("enrollments", distinct=True), waiting=Count("waitlist", distinct=True))
+            .order_by("code")
+        )
+        report, ok = [], True
+        for course in courses:
+            problems = []
+            if course.rows > course.capacity:
+                problems.append("oversold")
+            if course.enrolled_count != course.rows:
+                problems.append("enrolled_count drifted")
+            if course.waitlist_count != course.waiting:
+                problems.append("waitlist_count drifted")
+            ok = ok and not problems
+            report.append(
+                {
+                    "code": course.code,
+                    "capacity": course.capacity,
+                    "enrolled": course.rows,
+                    "enrolled_count": course.enrolled_count,
+                    "waitlisted": course.waiting,
+                    "problems": problems,
+                }
+            )
+        return {"ok": ok, "courses": report}
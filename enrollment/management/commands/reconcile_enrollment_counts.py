@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from enrollment.models import Course
+
+
+class Command(BaseCommand):
+    help = "Find courses whose stored enrolled_count or waitlist_count drifted from their rows and fix them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted courses without writing any changes.",
+        )
+
+    def handle(self, *args, **options):
+        drifted = Course.objects.with_counter_drift().order_by("pk")
+        found = 0
+        rows = drifted.values_list(
+            "pk", "code", "enrolled_count", "actual_count", "waitlist_count", "actual_waitlist"
+        ).iterator()
+        for pk, code, stored, actual, stored_waitlist, actual_waitlist in rows:
+            found += 1
+            if stored != actual:
+                self.stdout.write(f"{code} (id={pk}): stored {stored}, actual {actual}")
+            if stored_waitlist != actual_waitlist:
+                self.stdout.write(f"{code} (id={pk}): waitlist stored {stored_waitlist}, actual {actual_waitlist}")
+
+        if not found:
+            self.stdout.write(self.style.SUCCESS("All enrollment and waitlist counts are consistent."))
+            return
+        if options["dry_run"]:
+            self.stdout.write(f"{found} course(s) drifted; dry run, nothing changed.")
+            return
+
+        with transaction.atomic():
+            fixed = Course.objects.reconcile_counts()
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {fixed} course(s)."))
@@ -0,0 +1,150 @@
+"""
+Per-view request metrics, exposed in Prometheus text format.
+
+``MetricsMiddleware`` brackets each request with ``start_request`` and
+``finish_request``. Queries are counted by ``count_sql``, installed on every
+database connection, which charges the request in the current context, so the
+queries an async view runs through ``sync_to_async`` still land on its tally.
+
+Each thread records into its own table, so the request path takes no locks.
+``snapshot()`` sums the tables of every thread that has served a request. A
+scrape can catch a request half-recorded; the next scrape sees the rest, and
+counters never go backwards.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "unmatched"
+
+
+class _Tally:
+    __slots__ = ("queries", "sql_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+
+
+class _ViewStats:
+    __slots__ = ("requests", "latency_sum", "buckets", "queries", "sql_seconds", "over_budget")
+
+    def __init__(self):
+        self.requests = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.over_budget = 0
+
+
+_current: ContextVar[Optional[_Tally]] = ContextVar("request_sql_tally", default=None)
+_local = threading.local()
+_tables = []
+_tables_lock = threading.Lock()
+
+
+def _thread_table() -> dict:
+    table = getattr(_local, "table", None)
+    if table is None:
+        table = _local.table = {}
+        # Only taken once per thread; kept after the thread exits so counters never drop.
+        with _tables_lock:
+            _tables.append(table)
+    return table
+
+
+def count_sql(execute, sql, params, many, context):
+    """Database execute wrapper; see ``install_sql_counter``."""
+    tally = _current.get()
+    if tally is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        tally.queries += 1
+        tally.sql_seconds += time.perf_counter() - start
+
+
+def install_sql_counter(connection) -> None:
+    """Add ``count_sql`` to a new connection's execute wrappers, once."""
+    if count_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_sql)
+
+
+def start_request():
+    """Begin tallying SQL for the current context; pass the token to ``finish_request``."""
+    return _current.set(_Tally())
+
+
+def finish_request(token, view: str, seconds: float, budget=None) -> int:
+    """
+    Stop tallying and record the request against ``view``.
+
+    Returns the number of queries it ran; one over ``budget`` is also counted
+    in ``enrollment_query_budget_exceeded_total``.
+    """
+    tally = _current.get()
+    _current.reset(token)
+    table = _thread_table()
+    stats = table.get(view)
+    if stats is None:
+        stats = table[view] = _ViewStats()
+    stats.requests += 1
+    stats.latency_sum += seconds
+    stats.buckets[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+    stats.queries += tally.queries
+    stats.sql_seconds += tally.sql_seconds
+    stats.over_budget += budget is not None and tally.queries > budget
+    return tally.queries
+
+
+def snapshot() -> dict:
+    """Totals per view across every thread."""
+    with _tables_lock:
+        tables = list(_tables)
+    totals = {}
+    for table in tables:
+        for view, stats in list(table.items()):
+            total = totals.setdefault(view, _ViewStats())
+            total.requests += stats.requests
+            total.latency_sum += stats.latency_sum
+            total.buckets = [a + b for a, b in zip(total.buckets, stats.buckets)]
+            total.queries += stats.queries
+            total.sql_seconds += stats.sql_seconds
+            total.over_budget += stats.over_budget
+    return totals
+
+
+def _label(view: str) -> str:
+    return view.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def render() -> str:
+    lines = [
+        "# HELP enrollment_request_seconds Request latency by URL name.",
+        "# TYPE enrollment_request_seconds histogram",
+    ]
+    totals = sorted(snapshot().items())
+    for view, stats in totals:
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, "+Inf"), stats.buckets):
+            cumulative += count
+            lines.append(f'enrollment_request_seconds_bucket{{view="{_label(view)}",le="{bound}"}} {cumulative}')
+        lines.append(f'enrollment_request_seconds_sum{{view="{_label(view)}"}} {stats.latency_sum:.6f}')
+        lines.append(f'enrollment_request_seconds_count{{view="{_label(view)}"}} {stats.requests}')
+    for name, attribute, kind, help_text in (
+        ("enrollment_sql_queries_total", "queries", "counter", "SQL queries run by requests to the view."),
+        ("enrollment_sql_seconds_total", "sql_seconds", "counter", "Time spent in SQL by requests to the view."),
+        ("enrollment_query_budget_exceeded_total", "over_budget", "counter", "Requests over QUERY_BUDGETS."),
+    ):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for view, stats in totals:
+            value = getattr(stats, attribute)
+            lines.append(f'{name}{{view="{_label(view)}"}} {value:.6f}' if isinstance(value, float) else
+                         f'{name}{{view="{_label(view)}"}} {value}')
+    return "\n".join(lines) + "\n"
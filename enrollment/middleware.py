@@ -0,0 +1,83 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.utils.functional import SimpleLazyObject
+
+from . import auth, metrics, routers
+
+logger = logging.getLogger(__name__)
+
+PIN_COOKIE = "primary_pin"
+
+
+class ReplicaPinMiddleware:
+    """
+    Route a request's reads to the primary if its client wrote recently.
+
+    A request that writes gets a short-lived cookie holding the time its pin runs
+    out; requests arriving with an unexpired pin read from the primary. A forged
+    cookie can only send its own reads to the primary.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            pinned = float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+        except ValueError:
+            pinned = False
+        token = routers.begin(pinned=pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            state = routers.end(token)
+        if state.wrote:
+            window = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, f"{time.time() + window:.3f}", max_age=window, httponly=True, samesite="Lax"
+            )
+        return response
+
+
+class CachedUserAuthenticationMiddleware(AuthenticationMiddleware):
+    """``AuthenticationMiddleware`` that resolves ``request.user`` through ``enrollment.auth``."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: auth.get_user(request))
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class MetricsMiddleware:
+    """
+    Record latency and SQL per URL name (see ``enrollment.metrics``).
+
+    ``settings.QUERY_BUDGETS`` maps URL names to the most queries one request
+    may run. Going over is logged, or raises ``QueryBudgetExceeded`` when
+    ``QUERY_BUDGET_MODE`` is ``"raise"`` so a test or staging run fails loudly.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = metrics.start_request()
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            match = request.resolver_match
+            view = match.view_name if match is not None else metrics.UNMATCHED
+            budget = settings.QUERY_BUDGETS.get(view)
+            queries = metrics.finish_request(token, view, time.perf_counter() - start, budget)
+            if budget is not None and queries > budget:
+                message = f"{view} ran {queries} queries, over its budget of {budget}."
+                if settings.QUERY_BUDGET_MODE == "raise":
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
@@ -1,3 +1,4 @@
+from django.contrib.auth.hashers import make_password
 from django.db import migrations
 
 
@@ -30,7 +31,7 @@ def seed_users(apps, schema_editor):
         )
         obj.is_staff = user["is_staff"]
         obj.is_superuser = user["is_superuser"]
-        obj.set_password(user["password"])
+        obj.password = make_password(user["password"])
         obj.save()
 
 
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_enrolled_count(apps, schema_editor):
+    Course = apps.get_model("enrollment", "Course")
+    Enrollment = apps.get_model("enrollment", "Enrollment")
+    totals = (
+        Enrollment.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Course.objects.update(enrolled_count=Coalesce(Subquery(totals), 0))
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("enrollment", "0004_seed_default_users"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="enrolled_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_enrolled_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+import django.db.models.deletion
+import enrollment.models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("enrollment", "0005_course_enrolled_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CourseSearchEntry",
+            fields=[
+                (
+                    "course",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        db_constraint=False,
+                        on_delete=django.db.models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_entry",
+                        serialize=False,
+                        to="enrollment.course",
+                    ),
+                ),
+                ("document", enrollment.models.SearchDocumentField(db_column="enrollment_course_fts")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "enrollment_course_fts",
+                "managed": False,
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("enrollment", "0006_course_search_entry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="course",
+            name="waitlist_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name="Waitlist",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("position", models.PositiveIntegerField()),
+                ("joined_at", models.DateTimeField(auto_now_add=True)),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="waitlist", to="enrollment.course")),
+                ("student", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="waitlist_entries", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["course", "position"],
+                "indexes": [models.Index(fields=["course", "position"], name="waitlist_course_position_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="waitlist",
+            constraint=models.UniqueConstraint(fields=("student", "course"), name="unique_student_course_waitlist"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("enrollment", "0008_query_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MeetingTime",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("weekday", models.PositiveSmallIntegerField(choices=[(0, "Monday"), (1, "Tuesday"), (2, "Wednesday"), (3, "Thursday"), (4, "Friday"), (5, "Saturday"), (6, "Sunday")])),
+                ("start_time", models.TimeField()),
+                ("end_time", models.TimeField()),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="meeting_times", to="enrollment.course")),
+            ],
+            options={
+                "ordering": ["course", "weekday", "start_time"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="meetingtime",
+            constraint=models.CheckConstraint(check=models.Q(("end_time__gt", models.F("start_time"))), name="meeting_time_ends_after_start"),
+        ),
+    ]
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("enrollment", "0009_meeting_time"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Prerequisite",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="prerequisites", to="enrollment.course")),
+                ("requires", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="required_for", to="enrollment.course")),
+            ],
+            options={
+                "ordering": ["course", "requires"],
+            },
+        ),
+        migrations.CreateModel(
+            name="Completion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("completed_at", models.DateTimeField(auto_now_add=True)),
+                ("course", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="completions", to="enrollment.course")),
+                ("student", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="completions", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "ordering": ["student", "course"],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="prerequisite",
+            constraint=models.UniqueConstraint(fields=("course", "requires"), name="unique_course_prerequisite"),
+        ),
+        migrations.AddConstraint(
+            model_name="prerequisite",
+            constraint=models.CheckConstraint(check=models.Q(("course", models.F("requires")), _negated=True), name="prerequisite_not_self"),
+        ),
+        migrations.AddConstraint(
+            model_name="completion",
+            constraint=models.UniqueConstraint(fields=("student", "course"), name="unique_student_course_completion"),
+        ),
+    ]
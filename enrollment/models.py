@@ -1,5 +1,79 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Lookup
+from django.db.models import Count, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+
+
+def _counted_enrollments():
+    totals = (
+        Enrollment.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), 0)
+
+
+def _counted_waitlist():
+    totals = (
+        Waitlist.objects.filter(course=OuterRef("pk"))
+        .order_by()
+        .values("course")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(totals), 0)
+
+
+def _open_seats():
+    return Greatest(F("capacity") - F("enrolled_count"), Value(0))
+
+
+class CourseQuerySet(models.QuerySet):
+    def with_seat_counts(self):
+        """Annotate open seats from the stored counter; no join on enrollments."""
+        return self.annotate(open_seats=_open_seats())
+
+    def facet_counts(self):
+        """Courses and open seats per (semester, credits) pair, from one GROUP BY."""
+        return (
+            self.order_by()
+            .values("semester", "credits")
+            .annotate(courses=Count("pk"), open_seats=Sum(_open_seats()))
+        )
+
+    def update_counts(self, **counters) -> int:
+        """Update seat or waitlist counters and stamp ``updated_at``, since both show on course pages."""
+        return self.update(**counters, updated_at=Now())
+
+    def touch(self) -> int:
+        """Mark the matched courses modified, for changes stored outside the course row."""
+        return self.update(updated_at=Now())
+
+    def adjust_enrolled_count(self, delta: int) -> int:
+        """Atomically add ``delta`` to the stored counter of every matched course."""
+        if delta < 0:
+            return self.filter(enrolled_count__gte=-delta).update_counts(enrolled_count=F("enrolled_count") + delta)
+        return self.update_counts(enrolled_count=F("enrolled_count") + delta)
+
+    def with_counter_drift(self):
+        """Courses whose stored seat or waitlist counter disagrees with their enrollment or waitlist rows."""
+        return self.annotate(actual_count=_counted_enrollments(), actual_waitlist=_counted_waitlist()).exclude(
+            enrolled_count=F("actual_count"), waitlist_count=F("actual_waitlist")
+        )
+
+    def reconcile_counts(self) -> int:
+        """Recount both counters of drifted courses in one UPDATE; returns how many were fixed."""
+        return self.with_counter_drift().update_counts(
+            enrolled_count=_counted_enrollments(), waitlist_count=_counted_waitlist()
+        )
+
+
+# Kept by F() updates through CourseQuerySet, never by saving an instance.
+COUNTER_FIELDS = ("enrolled_count", "waitlist_count")
 
 
 class Course(models.Model):
@@ -9,20 +83,39 @@ class Course(models.Model):
     semester = models.CharField(max_length=50)
     credits = models.PositiveIntegerField(default=0)
     capacity = models.PositiveIntegerField(default=0)
+    enrolled_count = models.PositiveIntegerField(default=0, editable=False)
+    waitlist_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Moves with edits and with every seat or waitlist count change; the Last-Modified of course pages.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CourseQuerySet.as_manager()
 
     class Meta:
         ordering = ["code"]
+        indexes = [
+            # Catalog order and keyset cursors: SQLite appends the rowid, so this
+            # covers ORDER BY code, id. Also serves (code, semester) lookups on import.
+            models.Index(fields=["code"], name="course_code_idx"),
+            # Exact semester filters ordered by code, and the admin's semester list.
+            models.Index(fields=["semester", "code"], name="course_semester_code_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.code} - {self.title}"
 
-    @property
-    def enrolled_count(self) -> int:
-        return self.enrollments.count()
+    def save(self, *args, update_fields=None, **kwargs):
+        """Never write the counters back on updates; an instance loaded before a concurrent enroll holds stale values."""
+        if not self._state.adding and self.pk is not None and not kwargs.get("force_insert"):
+            if update_fields is None:
+                update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+            update_fields = [name for name in update_fields if name not in COUNTER_FIELDS]
+        super().save(*args, update_fields=update_fields, **kwargs)
 
     @property
     def seats_remaining(self) -> int:
+        if hasattr(self, "open_seats"):
+            return self.open_seats
         return max(self.capacity - self.enrolled_count, 0)
 
 
@@ -40,6 +133,13 @@ class Enrollment(models.Model):
         constraints = [
             models.UniqueConstraint(fields=["student", "course"], name="unique_student_course_enrollment"),
         ]
+        indexes = [
+            # my_courses: one student's enrollments newest first, read backwards
+            # so the trailing rowid also gives the -pk tiebreaker.
+            models.Index(fields=["student", "enrolled_at"], name="enrollment_student_recent_idx"),
+            # The admin changelist's default ordering.
+            models.Index(fields=["enrolled_at"], name="enrollment_recent_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.student.username} -> {self.course.code}"
@@ -48,3 +148,141 @@ class Enrollment(models.Model):
     def user(self):
         """Backward compatibility alias; prefer .student."""
         return self.student
+
+
+class Waitlist(models.Model):
+    """
+    A student's place in line for a full course.
+
+    Positions are dense (1..n) per course and are shifted down in bulk when
+    someone ahead leaves or is promoted, so showing a student's place is a
+    single row read rather than a count of everyone ahead of them.
+    """
+
+    student = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="waitlist_entries",
+    )
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="waitlist")
+    position = models.PositiveIntegerField()
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["course", "position"]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "course"], name="unique_student_course_waitlist"),
+        ]
+        indexes = [
+            models.Index(fields=["course", "position"], name="waitlist_course_position_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.student.username} waiting for {self.course.code} (#{self.position})"
+
+
+class MeetingTime(models.Model):
+    """A weekly class meeting; courses in the same semester whose meetings overlap conflict."""
+
+    class Weekday(models.IntegerChoices):
+        MONDAY = 0
+        TUESDAY = 1
+        WEDNESDAY = 2
+        THURSDAY = 3
+        FRIDAY = 4
+        SATURDAY = 5
+        SUNDAY = 6
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="meeting_times")
+    weekday = models.PositiveSmallIntegerField(choices=Weekday.choices)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    class Meta:
+        ordering = ["course", "weekday", "start_time"]
+        constraints = [
+            models.CheckConstraint(check=models.Q(end_time__gt=F("start_time")), name="meeting_time_ends_after_start"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.course.code} {self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class Prerequisite(models.Model):
+    """``course`` can only be taken once ``requires`` (and its own prerequisites) are completed."""
+
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="prerequisites")
+    requires = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="required_for")
+
+    class Meta:
+        ordering = ["course", "requires"]
+        constraints = [
+            models.UniqueConstraint(fields=["course", "requires"], name="unique_course_prerequisite"),
+            models.CheckConstraint(check=~models.Q(course=F("requires")), name="prerequisite_not_self"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.course.code} requires {self.requires.code}"
+
+    def clean(self):
+        from .prerequisites import prerequisite_graph
+
+        if self.course_id and self.requires_id and prerequisite_graph().would_cycle(self.course_id, self.requires_id):
+            raise ValidationError(
+                {"requires": "That course already depends on this one; the prerequisite would form a cycle."}
+            )
+
+
+class Completion(models.Model):
+    """A course the student has passed, which counts towards prerequisites."""
+
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="completions")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="completions")
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["student", "course"]
+        constraints = [
+            models.UniqueConstraint(fields=["student", "course"], name="unique_student_course_completion"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.student.username} completed {self.course.code}"
+
+
+class SearchDocumentField(models.TextField):
+    """The hidden column an FTS5 table shares its name with; only queried via ``match``."""
+
+
+@SearchDocumentField.register_lookup
+class Match(Lookup):
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", [*lhs_params, *rhs_params]
+
+
+class CourseSearchEntry(models.Model):
+    """
+    Read-only view of the FTS5 course index (see ``enrollment.search``).
+
+    The table is created outside migrations because it only exists on SQLite
+    builds with FTS5; this model just lets the ORM join against it.
+    """
+
+    course = models.OneToOneField(
+        Course,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        on_delete=models.DO_NOTHING,
+        related_name="search_entry",
+    )
+    document = SearchDocumentField(db_column="enrollment_course_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "enrollment_course_fts"
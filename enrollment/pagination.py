@@ -0,0 +1,167 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are addressed by the sort key of their boundary row instead of an
+OFFSET, so fetching page 500 is the same index range scan as page 1, and no
+COUNT query is needed: each page fetches one extra row to learn whether
+another page follows.
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Sequence
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import QueryDict
+
+
+CURSOR_PARAM = "cursor"
+# SQLite's INTEGER; a larger Python int only fails once the query runs.
+MAX_SQL_INTEGER = 2 ** 63 - 1
+
+
+@dataclass
+class KeysetPage:
+    object_list: list
+    next_cursor: Optional[str] = None
+    previous_cursor: Optional[str] = None
+    params: Optional[QueryDict] = None
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def next_query(self) -> str:
+        return self._query_with(self.next_cursor)
+
+    @property
+    def previous_query(self) -> str:
+        return self._query_with(self.previous_cursor)
+
+    def _query_with(self, cursor: Optional[str]) -> str:
+        # Keep the caller's filters and only swap the cursor.
+        params = self.params.copy() if self.params is not None else QueryDict(mutable=True)
+        params.pop(CURSOR_PARAM, None)
+        if cursor:
+            params[CURSOR_PARAM] = cursor
+        return params.urlencode()
+
+
+def _encode(direction: str, values: list) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps([direction, values], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str, key_count: int):
+    try:
+        direction, values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        return None, None
+    if direction not in ("n", "p") or not isinstance(values, list) or len(values) != key_count:
+        return None, None
+    return direction, values
+
+
+def _ordering_field(queryset, name: str):
+    if name in queryset.query.annotations:
+        return queryset.query.annotations[name].output_field
+    opts = queryset.model._meta
+    return opts.pk if name == "pk" else opts.get_field(name)
+
+
+def _typed(queryset, fields: Sequence[str], values: list):
+    """The cursor's values cleaned by their ordering fields, or ``None`` if any of them does not fit."""
+    try:
+        values = [_ordering_field(queryset, field.lstrip("-")).clean(value, None) for field, value in zip(fields, values)]
+    except (ValueError, TypeError, ValidationError):
+        return None
+    # Keys are never null, and a null cannot be compared against in the filter.
+    if any(value is None or isinstance(value, int) and abs(value) > MAX_SQL_INTEGER for value in values):
+        return None
+    return values
+
+
+def _key_of(obj, fields: Sequence[str]) -> list:
+    if isinstance(obj, dict):
+        return [obj[field.lstrip("-")] for field in fields]
+    return [getattr(obj, field.lstrip("-")) for field in fields]
+
+
+def _beyond(fields: Sequence[str], values: list, backwards: bool) -> Q:
+    """Rows strictly after ``values`` in ``fields`` order (or before, if ``backwards``)."""
+    condition = Q()
+    for index, field in enumerate(fields):
+        name = field.lstrip("-")
+        descending = field.startswith("-") != backwards
+        step = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+        for prior_field, prior_value in zip(fields[:index], values):
+            step &= Q(**{prior_field.lstrip("-"): prior_value})
+        condition |= step
+    return condition
+
+
+def _read_cursor(queryset, ordering: Sequence[str], params: QueryDict) -> tuple:
+    cursor = params.get(CURSOR_PARAM)
+    direction, values = _decode(cursor, len(ordering)) if cursor else (None, None)
+    if values is not None:
+        values = _typed(queryset, ordering, values)
+    return (direction, values) if values is not None else (None, None)
+
+
+def cursor_of(queryset, ordering: Sequence[str], params: QueryDict) -> str:
+    """The cursor in ``params`` re-encoded from its cleaned values; empty if it yields the first page."""
+    direction, values = _read_cursor(queryset, ordering, params)
+    return _encode(direction, values) if values is not None else ""
+
+
+def paginate_keyset(queryset, ordering: Sequence[str], params: QueryDict, page_size: int) -> KeysetPage:
+    """
+    Return the page of ``queryset`` (ordered by ``ordering``) that the cursor in
+    ``params`` points at.
+
+    ``ordering`` must end in a unique field (normally ``pk``) so every row has a
+    distinct key. A missing or unreadable cursor yields the first page.
+    """
+    direction, values = _read_cursor(queryset, ordering, params)
+    backwards = direction == "p"
+    if backwards:
+        ordering_used = [field[1:] if field.startswith("-") else f"-{field}" for field in ordering]
+    else:
+        ordering_used = list(ordering)
+
+    queryset = queryset.order_by(*ordering_used)
+    if values is not None:
+        queryset = queryset.filter(_beyond(ordering, values, backwards))
+    rows = list(queryset[: page_size + 1])
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    page = KeysetPage(rows, params=params)
+    if rows:
+        # Arriving through a cursor means there are rows on the side we came from.
+        more_after = values is not None if backwards else has_more
+        more_before = has_more if backwards else values is not None
+        if more_after:
+            page.next_cursor = _encode("n", _key_of(rows[-1], ordering))
+        if more_before:
+            page.previous_cursor = _encode("p", _key_of(rows[0], ordering))
+    return page
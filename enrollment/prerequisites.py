@@ -0,0 +1,129 @@
+"""
+Prerequisite checks against a compiled, in-memory prerequisite graph.
+
+Each process holds a ``PrerequisiteGraph`` mapping every course to the frozen
+set of courses it requires, directly or through other prerequisites. Checking a
+student is then one subset test of that set against their completed courses,
+which are cached per student. Enrolling makes one such test and ``course_list``
+makes one per card, so no query walks the graph at registration time.
+
+The graph is rebuilt from a single query when the shared prerequisites version
+moves. A prerequisite added in this process is folded into a copy of its graph
+once the transaction commits, and the version is bumped so other processes
+rebuild. Edits and deletions only bump the version.
+"""
+import threading
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import bump_prerequisites_version, completions_version, prerequisites_version
+from .models import Completion, Prerequisite
+
+COMPLETIONS_TIMEOUT = 60 * 60
+
+
+class PrerequisiteGraph:
+    def __init__(self, edges=()):
+        self._direct = {}
+        for course_id, requires_id in edges:
+            self._direct.setdefault(course_id, set()).add(requires_id)
+        self._closure = self._compile(self._direct)
+
+    @staticmethod
+    def _compile(direct: dict) -> dict:
+        """Transitive prerequisites of every course, by iterative depth-first search."""
+        closure = {}
+        for root in direct:
+            if root in closure:
+                continue
+            stack, visiting = [(root, iter(direct[root]))], {root}
+            while stack:
+                course_id, pending = stack[-1]
+                child = next(pending, None)
+                if child is None:
+                    stack.pop()
+                    visiting.discard(course_id)
+                    required = set()
+                    for requires_id in direct.get(course_id, ()):
+                        required.add(requires_id)
+                        required |= closure.get(requires_id, frozenset())
+                    closure[course_id] = frozenset(required)
+                # A cycle can only come from rows written around the model's validation; cut it.
+                elif child not in closure and child not in visiting:
+                    visiting.add(child)
+                    stack.append((child, iter(direct.get(child, ()))))
+        return closure
+
+    def required(self, course_id: int) -> frozenset:
+        return self._closure.get(course_id, frozenset())
+
+    def would_cycle(self, course_id: int, requires_id: int) -> bool:
+        return course_id == requires_id or course_id in self.required(requires_id)
+
+    def with_edge(self, course_id: int, requires_id: int) -> "PrerequisiteGraph":
+        """A copy with one more prerequisite, updated incrementally rather than recompiled."""
+        graph = PrerequisiteGraph()
+        graph._direct = {key: set(value) for key, value in self._direct.items()}
+        graph._direct.setdefault(course_id, set()).add(requires_id)
+        added = self.required(requires_id) | {requires_id}
+        graph._closure = {
+            key: required | added if course_id in required else required for key, required in self._closure.items()
+        }
+        graph._closure[course_id] = self.required(course_id) | added
+        return graph
+
+
+_lock = threading.Lock()
+_graph = None
+_graph_version = None
+
+
+def prerequisite_graph() -> PrerequisiteGraph:
+    """This process's graph, rebuilt if another process changed prerequisites."""
+    global _graph, _graph_version
+    version = prerequisites_version()
+    if _graph is None or _graph_version != version:
+        with _lock:
+            if _graph is None or _graph_version != version:
+                _graph = PrerequisiteGraph(Prerequisite.objects.order_by().values_list("course_id", "requires_id"))
+                _graph_version = version
+    return _graph
+
+
+def prerequisite_added(course_id: int, requires_id: int) -> None:
+    def apply():
+        global _graph, _graph_version
+        with _lock:
+            version = bump_prerequisites_version()
+            # Fold the edge in only if nobody else changed the graph since we compiled it.
+            if _graph is not None and _graph_version == version - 1:
+                _graph = _graph.with_edge(course_id, requires_id)
+                _graph_version = version
+
+    transaction.on_commit(apply)
+
+
+def prerequisites_changed() -> None:
+    transaction.on_commit(bump_prerequisites_version)
+
+
+def completed_courses(student_id: int) -> frozenset:
+    key = f"student:{student_id}:completed:{completions_version(student_id)}"
+    completed = cache.get(key)
+    if completed is None:
+        completed = frozenset(
+            Completion.objects.filter(student_id=student_id).order_by().values_list("course_id", flat=True)
+        )
+        cache.set(key, completed, timeout=COMPLETIONS_TIMEOUT)
+    return completed
+
+
+def missing_prerequisites(student_id: int, course_id: int) -> frozenset:
+    return prerequisite_graph().required(course_id) - completed_courses(student_id)
+
+
+def ineligible_courses(student_id: int, course_ids) -> set:
+    """Which of ``course_ids`` the student lacks prerequisites for, in one pass."""
+    graph, completed = prerequisite_graph(), completed_courses(student_id)
+    return {course_id for course_id in course_ids if not graph.required(course_id) <= completed}
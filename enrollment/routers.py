@@ -0,0 +1,85 @@
+"""
+Primary/replica database routing with read-your-writes stickiness.
+
+Writes always go to ``default``. Reads go to a random alias from
+``settings.DATABASE_REPLICAS`` unless the current unit of work is pinned to the
+primary, which happens when:
+
+- it has already written (or is inside a transaction on the primary), so it
+  never reads around its own uncommitted or just-committed rows;
+- it is a request from a user who wrote within ``REPLICA_PIN_SECONDS``
+  (``ReplicaPinMiddleware`` carries that across requests in a cookie), so
+  ``my_courses`` right after ``enroll_course`` cannot miss the new enrollment.
+
+Sessions are always read from the primary: a replica lagging behind a login
+would otherwise log the user straight back out.
+"""
+import random
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY_ONLY_APPS = {"sessions"}
+
+
+class RoutingState:
+    def __init__(self, pinned: bool = False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state: ContextVar[Optional[RoutingState]] = ContextVar("replica_routing_state", default=None)
+
+
+def begin(pinned: bool = False):
+    """Start a unit of work (a request, say); returns a token for ``end``."""
+    return _state.set(RoutingState(pinned))
+
+
+def end(token) -> RoutingState:
+    state = _state.get()
+    _state.reset(token)
+    return state
+
+
+def pin_to_primary() -> None:
+    state = _state.get()
+    if state is None:
+        # Outside a request (shell, management commands): pin for the rest of this context.
+        state = RoutingState()
+        _state.set(state)
+    state.pinned = True
+
+
+class PrimaryReplicaRouter:
+    def _replicas(self) -> list:
+        return getattr(settings, "DATABASE_REPLICAS", [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self._replicas()
+        if not replicas or model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        state = _state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        if model._meta.app_label not in PRIMARY_ONLY_APPS:
+            pin_to_primary()
+            _state.get().wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *self._replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas copy the primary's schema through replication.
+        if db in self._replicas():
+            return False
+        return None
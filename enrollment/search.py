@@ -0,0 +1,114 @@
+"""
+Full-text course search backed by an SQLite FTS5 index.
+
+The index is an external-content FTS5 table over ``enrollment_course`` using the
+trigram tokenizer, so a MATCH behaves like the old ``icontains`` filters (case
+insensitive substring search) but is answered from the index instead of a LIKE
+scan. Triggers keep it in sync on insert, update and delete. Table rebuilds
+during migrations drop those triggers, so ``install_course_search`` runs after
+every ``migrate`` and re-creates whatever is missing.
+
+Databases without FTS5 (or search terms shorter than one trigram) fall back to
+the ``icontains`` filters.
+"""
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.db.models import F, Q
+
+from .models import Course, CourseSearchEntry
+
+FTS_TABLE = CourseSearchEntry._meta.db_table
+MIN_MATCH_LENGTH = 3
+
+_COURSE_TABLE = Course._meta.db_table
+_COLUMNS = "code, title, description"
+
+_TRIGGERS = {
+    f"{FTS_TABLE}_ai": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON {_COURSE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, new.code, new.title, new.description);
+        END
+    """,
+    f"{FTS_TABLE}_ad": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON {_COURSE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+            VALUES ('delete', old.id, old.code, old.title, old.description);
+        END
+    """,
+    f"{FTS_TABLE}_au": f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {_COLUMNS} ON {_COURSE_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {_COLUMNS})
+            VALUES ('delete', old.id, old.code, old.title, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, {_COLUMNS}) VALUES (new.id, new.code, new.title, new.description);
+        END
+    """,
+}
+
+
+def _existing_objects(cursor) -> set:
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = %s)",
+        [FTS_TABLE, _COURSE_TABLE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def install_course_search(using: str = DEFAULT_DB_ALIAS) -> bool:
+    """Create the FTS table and triggers if missing; returns whether FTS is in use."""
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        existing = _existing_objects(cursor)
+        missing = [name for name in (FTS_TABLE, *_TRIGGERS) if name not in existing]
+        if not missing:
+            return True
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+                f"{_COLUMNS}, content='{_COURSE_TABLE}', content_rowid='id', tokenize='trigram')"
+            )
+        except DatabaseError:
+            # SQLite built without FTS5 or too old for the trigram tokenizer.
+            return False
+        for sql in _TRIGGERS.values():
+            cursor.execute(sql)
+        # Rows written while the triggers were missing are only caught by a rebuild.
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    connection.course_search_ready = True
+    return True
+
+
+def fts_enabled(using: str = DEFAULT_DB_ALIAS) -> bool:
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return False
+    ready = getattr(connection, "course_search_ready", None)
+    if ready is None:
+        with connection.cursor() as cursor:
+            ready = FTS_TABLE in _existing_objects(cursor)
+        connection.course_search_ready = ready
+    return ready
+
+
+def _match_expression(term: str) -> str:
+    # One quoted phrase: trigram matching then equals a substring search.
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def is_ranked(queryset) -> bool:
+    """Whether ``queryset`` came from the index and carries a ``search_rank``."""
+    return "search_rank" in queryset.query.annotations
+
+
+def search_courses(queryset, term: str):
+    """Filter ``queryset`` to courses matching ``term``, best matches first."""
+    term = term.strip()
+    if len(term) < MIN_MATCH_LENGTH or not fts_enabled(queryset.db):
+        return queryset.filter(
+            Q(code__icontains=term) | Q(title__icontains=term) | Q(description__icontains=term)
+        )
+    return (
+        queryset.filter(search_entry__document__match=_match_expression(term))
+        .annotate(search_rank=F("search_entry__rank"))
+        .order_by("search_rank", "code")
+    )
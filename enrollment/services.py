@@ -0,0 +1,319 @@
+from collections import Counter
+from dataclasses import dataclass
+from enum import Enum
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, When
+
+from .cache import invalidate_course, invalidate_schedule
+from .models import Course, Enrollment, Prerequisite, Waitlist
+from .prerequisites import missing_prerequisites
+from .schedule import ScheduleIndex, course_slots, find_conflicts
+
+
+class EnrollOutcome(str, Enum):
+    ENROLLED = "enrolled"
+    FULL = "full"
+    ALREADY_ENROLLED = "already_enrolled"
+    CONFLICT = "conflict"
+    MISSING_PREREQUISITES = "missing_prerequisites"
+
+
+def _lock_courses(course_ids: list) -> None:
+    """
+    Make the current transaction a writer on these courses before it reads anything.
+
+    The no-op UPDATE row-locks the courses on Postgres. On SQLite it takes the
+    database write lock up front: a transaction that reads first and writes later
+    cannot wait for that lock and fails at once with "database is locked".
+    """
+    Course.objects.filter(pk__in=course_ids).update(enrolled_count=F("enrolled_count"))
+
+
+def enroll_student(student, course_id: int) -> EnrollOutcome:
+    """
+    Reserve a seat and enroll ``student`` without a check-then-insert race.
+
+    The seat is claimed by a single conditional UPDATE on the course counter, so
+    concurrent callers can never push it past capacity. If the enrollment row
+    then collides with an existing one, the reservation is rolled back.
+    A student who has not completed every prerequisite gets
+    ``MISSING_PREREQUISITES``, and a course meeting at the same time as one they
+    already take that semester gets ``CONFLICT``, both before any write.
+    Raises ``Course.DoesNotExist`` for an unknown course.
+    """
+    if missing_prerequisites(student.pk, course_id):
+        return EnrollOutcome.MISSING_PREREQUISITES
+    if find_conflicts(student.pk, [course_id]).get(course_id):
+        return EnrollOutcome.CONFLICT
+    with transaction.atomic():
+        reserved = Course.objects.filter(pk=course_id, enrolled_count__lt=F("capacity")).adjust_enrolled_count(1)
+        if not reserved:
+            if Enrollment.objects.filter(student=student, course_id=course_id).exists():
+                return EnrollOutcome.ALREADY_ENROLLED
+            if not Course.objects.filter(pk=course_id).exists():
+                raise Course.DoesNotExist(f"No course with id {course_id}.")
+            return EnrollOutcome.FULL
+
+        enrollment = Enrollment(student=student, course_id=course_id)
+        # Tell the counter signal the seat has already been counted above.
+        enrollment._seat_reserved = True
+        try:
+            with transaction.atomic():
+                enrollment.save()
+        except IntegrityError:
+            transaction.set_rollback(True)
+            return EnrollOutcome.ALREADY_ENROLLED
+        _leave_waitlist(student, course_id)
+    return EnrollOutcome.ENROLLED
+
+
+def add_prerequisite(course_id: int, requires_id: int) -> Prerequisite:
+    """Require ``requires_id`` before ``course_id``; raises ``ValidationError`` if that would form a cycle."""
+    prerequisite = Prerequisite(course_id=course_id, requires_id=requires_id)
+    prerequisite.full_clean()
+    prerequisite.save()
+    return prerequisite
+
+
+def drop_student(student, course_id: int) -> bool:
+    """Drop ``student`` from the course and hand freed seats to the waitlist, atomically."""
+    with transaction.atomic():
+        _lock_courses([course_id])
+        deleted, _ = Enrollment.objects.filter(student=student, course_id=course_id).delete()
+        if deleted:
+            promote_waitlist(course_id)
+    return bool(deleted)
+
+
+def join_waitlist(student, course_id: int):
+    """
+    Queue ``student`` for a full course; returns their 1-based position.
+
+    A seat may have freed up since the caller found the course full, so the
+    queue is promoted in the same transaction. Returns ``None`` if that
+    enrolled ``student``.
+    """
+    with transaction.atomic():
+        _lock_courses([course_id])
+        position = waitlist_position(student, course_id)
+        if position is not None:
+            return position
+        Course.objects.filter(pk=course_id).update_counts(waitlist_count=F("waitlist_count") + 1)
+        position = Course.objects.values_list("waitlist_count", flat=True).get(pk=course_id)
+        Waitlist.objects.create(student=student, course_id=course_id, position=position)
+        if promote_waitlist(course_id):
+            position = waitlist_position(student, course_id)
+    invalidate_course(course_id)
+    return position
+
+
+def leave_waitlist(student, course_id: int) -> bool:
+    with transaction.atomic():
+        _lock_courses([course_id])
+        return _leave_waitlist(student, course_id)
+
+
+def _leave_waitlist(student, course_id: int) -> bool:
+    entry = Waitlist.objects.filter(student=student, course_id=course_id).first()
+    if entry is None:
+        return False
+    entry.delete()
+    Waitlist.objects.filter(course_id=course_id, position__gt=entry.position).update(position=F("position") - 1)
+    Course.objects.filter(pk=course_id).update_counts(waitlist_count=F("waitlist_count") - 1)
+    invalidate_course(course_id)
+    return True
+
+
+def waitlist_position(student, course_id: int):
+    return Waitlist.objects.filter(student=student, course_id=course_id).values_list("position", flat=True).first()
+
+
+async def awaitlist_position(student, course_id: int):
+    return await Waitlist.objects.filter(student=student, course_id=course_id).values_list("position", flat=True).afirst()
+
+
+def promote_waitlist(course_id: int) -> list:
+    """
+    Move the head of the waitlist into any free seats, in one batch.
+
+    Returns the ids of the promoted students. A student whose schedule now
+    conflicts with the course, or who lacks a prerequisite, is passed over but
+    keeps their place, so they are first in line again once that is resolved.
+    Must run inside the transaction that freed the seats so nobody else can
+    take them first.
+    """
+    with transaction.atomic():
+        course = (
+            Course.objects.select_for_update()
+            .only("capacity", "enrolled_count", "waitlist_count")
+            .filter(pk=course_id)
+            .first()
+        )
+        if course is None or not course.waitlist_count or course.capacity <= course.enrolled_count:
+            return []
+        seats = course.capacity - course.enrolled_count
+        queue = Waitlist.objects.filter(course_id=course_id).order_by("position").values_list("student_id", "position")
+        enrolled = set(Enrollment.objects.filter(course_id=course_id).values_list("student_id", flat=True))
+        promoted, removed = [], []
+        for student, position in queue.iterator():
+            if len(promoted) == seats:
+                break
+            if student in enrolled:
+                removed.append((student, position))
+            elif not missing_prerequisites(student, course_id) and not find_conflicts(student, [course_id])[course_id]:
+                promoted.append(student)
+                removed.append((student, position))
+        if not removed:
+            return []
+
+        Enrollment.objects.bulk_create(Enrollment(student_id=student, course_id=course_id) for student in promoted)
+        Waitlist.objects.filter(course_id=course_id, student_id__in=[student for student, _ in removed]).delete()
+        # Close the gaps: everyone still queued moves up by the number of removed entries ahead of them.
+        shifts = [
+            When(position__gt=position, then=F("position") - ahead)
+            for ahead, (_, position) in reversed(list(enumerate(removed, 1)))
+        ]
+        Waitlist.objects.filter(course_id=course_id, position__gt=removed[0][1]).update(position=Case(*shifts))
+        # bulk_create skips the counter signals, so adjust both counters here.
+        Course.objects.filter(pk=course_id).update_counts(
+            enrolled_count=F("enrolled_count") + len(promoted),
+            waitlist_count=F("waitlist_count") - len(removed),
+        )
+    invalidate_course(course_id)
+    for student in promoted:
+        invalidate_schedule(student)
+    return promoted
+
+
+@dataclass
+class PairResult:
+    student_id: int
+    course_id: int
+    outcome: EnrollOutcome
+
+
+def _insert_enrollments(new_rows: list) -> None:
+    """
+    Insert ``new_rows`` with one batched INSERT and bump each course counter in one UPDATE.
+
+    Call inside the transaction that locked the courses and counted their seats.
+    The students leave the waitlists of the courses they got into.
+    """
+    if not new_rows:
+        return
+    added = Counter(row.course_id for row in new_rows)
+    Enrollment.objects.bulk_create(new_rows, batch_size=500, ignore_conflicts=True)
+    # bulk_create skips the counter signals.
+    Course.objects.filter(pk__in=added).update_counts(
+        enrolled_count=F("enrolled_count") + Case(*(When(pk=pk, then=count) for pk, count in added.items()), default=0)
+    )
+    waitlisted = Waitlist.objects.filter(student_id__in={row.student_id for row in new_rows}, course_id__in=added)
+    for entry in waitlisted.select_related("student"):
+        _leave_waitlist(entry.student, entry.course_id)
+
+
+def _invalidate_inserted(new_rows: list) -> None:
+    for course_id in {row.course_id for row in new_rows}:
+        invalidate_course(course_id)
+    for student_id in {row.student_id for row in new_rows}:
+        invalidate_schedule(student_id)
+
+
+def _open_seats(course_ids: list) -> dict:
+    """``{course_id: free seats}`` for the existing courses in ``course_ids``, from one query."""
+    return {
+        pk: max(capacity - enrolled, 0)
+        for pk, capacity, enrolled in Course.objects.filter(pk__in=course_ids).values_list("pk", "capacity", "enrolled_count")
+    }
+
+
+def bulk_enroll(student_ids: list, course_ids: list) -> list:
+    """
+    Enroll every student in every course in one transaction.
+
+    Capacity and existing enrollments are read once for the whole cohort, new
+    rows go in with one batched insert, and each course counter is bumped in a
+    single UPDATE. Seats are handed out in ``student_ids`` order. Meeting-time
+    conflicts are not checked: this is staff placing students deliberately.
+    Returns a ``PairResult`` per distinct (student, course) pair.
+    """
+    student_ids, course_ids = list(dict.fromkeys(student_ids)), list(dict.fromkeys(course_ids))
+    results, new_rows = [], []
+    with transaction.atomic():
+        # Locked first, so the counts read below cannot change before the insert.
+        _lock_courses(course_ids)
+        seats = _open_seats(course_ids)
+        existing = set(
+            Enrollment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+            .values_list("student_id", "course_id")
+        )
+
+        for course_id in course_ids:
+            if course_id not in seats:
+                continue
+            for student_id in student_ids:
+                if (student_id, course_id) in existing:
+                    outcome = EnrollOutcome.ALREADY_ENROLLED
+                elif seats[course_id] > 0:
+                    seats[course_id] -= 1
+                    new_rows.append(Enrollment(student_id=student_id, course_id=course_id))
+                    outcome = EnrollOutcome.ENROLLED
+                else:
+                    outcome = EnrollOutcome.FULL
+                results.append(PairResult(student_id, course_id, outcome))
+        _insert_enrollments(new_rows)
+    _invalidate_inserted(new_rows)
+    return results
+
+
+def enroll_cart(student, course_ids: list) -> list:
+    """
+    Enroll ``student`` in every course of their registration cart in one transaction.
+
+    Prerequisites and clashes with the student's current timetable are checked
+    first, from the cached graph and schedule. The remaining courses then cost
+    one capacity query, one query for existing enrollments and one batched
+    insert, whatever the cart size. Courses are taken in cart order, so of two
+    cart courses that meet at the same time the first one wins. Returns a
+    ``PairResult`` per existing course, in cart order.
+    """
+    course_ids = list(dict.fromkeys(course_ids))
+    blocked = {
+        course_id: EnrollOutcome.MISSING_PREREQUISITES
+        for course_id in course_ids
+        if missing_prerequisites(student.pk, course_id)
+    }
+    slots = course_slots([course_id for course_id in course_ids if course_id not in blocked])
+    for course_id, clashes in find_conflicts(student.pk, list(slots)).items():
+        if clashes:
+            blocked[course_id] = EnrollOutcome.CONFLICT
+    candidates = [course_id for course_id in course_ids if course_id in slots and course_id not in blocked]
+
+    new_rows, outcomes = [], {}
+    with transaction.atomic():
+        _lock_courses(candidates)
+        seats = _open_seats(candidates)
+        existing = set(
+            Enrollment.objects.filter(student=student, course_id__in=candidates).values_list("course_id", flat=True)
+        )
+        # The cart courses being taken, per semester, to catch clashes between them.
+        taking = {}
+        for course_id in candidates:
+            if course_id not in seats:
+                continue
+            if course_id in existing:
+                outcomes[course_id] = EnrollOutcome.ALREADY_ENROLLED
+            elif not seats[course_id]:
+                outcomes[course_id] = EnrollOutcome.FULL
+            elif ScheduleIndex(taking).conflicts(*slots[course_id]):
+                outcomes[course_id] = EnrollOutcome.CONFLICT
+            else:
+                semester, meetings = slots[course_id]
+                taking.setdefault(semester, []).extend(meetings)
+                new_rows.append(Enrollment(student_id=student.pk, course_id=course_id))
+                outcomes[course_id] = EnrollOutcome.ENROLLED
+        _insert_enrollments(new_rows)
+    _invalidate_inserted(new_rows)
+    outcomes.update(blocked)
+    return [PairResult(student.pk, course_id, outcomes[course_id]) for course_id in course_ids if course_id in outcomes]
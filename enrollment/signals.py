@@ -0,0 +1,146 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.backends.signals import connection_created
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import auth, metrics
+from .cache import (
+    invalidate_catalog,
+    invalidate_completions,
+    invalidate_course,
+    invalidate_meeting_times,
+    invalidate_schedule,
+)
+from .models import Completion, Course, Enrollment, MeetingTime, Prerequisite
+from .prerequisites import prerequisite_added, prerequisites_changed
+from .search import install_course_search
+from .services import leave_waitlist
+
+
+def _bump_counter(enrollment: Enrollment, course_id: int, delta: int) -> None:
+    Course.objects.filter(pk=course_id).adjust_enrolled_count(delta)
+    # Keep an already-loaded course in step with the row we just changed.
+    if Enrollment.course.is_cached(enrollment) and enrollment.course.pk == course_id:
+        enrollment.course.enrolled_count = max(enrollment.course.enrolled_count + delta, 0)
+
+
+@receiver(pre_save, sender=Enrollment)
+def remember_previous_course(sender, instance: Enrollment, raw: bool, **kwargs) -> None:
+    instance._previous_course_id = instance._previous_student_id = None
+    if raw or instance._state.adding:
+        return
+    instance._previous_course_id, instance._previous_student_id = (
+        Enrollment.objects.filter(pk=instance.pk).values_list("course_id", "student_id").first() or (None, None)
+    )
+
+
+@receiver(post_save, sender=Enrollment)
+def count_saved_enrollment(sender, instance: Enrollment, created: bool, raw: bool, **kwargs) -> None:
+    if raw:
+        return
+    if created:
+        if not getattr(instance, "_seat_reserved", False):
+            _bump_counter(instance, instance.course_id, 1)
+        return
+    previous = getattr(instance, "_previous_course_id", None)
+    if previous is not None and previous != instance.course_id:
+        _bump_counter(instance, previous, -1)
+        _bump_counter(instance, instance.course_id, 1)
+
+
+def _deletes_course(origin, course_id: int) -> bool:
+    if isinstance(origin, Course):
+        return origin.pk == course_id
+    return isinstance(origin, QuerySet) and origin.model is Course
+
+
+@receiver(post_delete, sender=Enrollment)
+def count_deleted_enrollment(sender, instance: Enrollment, origin=None, **kwargs) -> None:
+    # The course row goes away with its enrollments; there is nothing to decrement.
+    if _deletes_course(origin, instance.course_id):
+        return
+    _bump_counter(instance, instance.course_id, -1)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def invalidate_cached_course(sender, instance: Course, **kwargs) -> None:
+    invalidate_course(instance.pk)
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_cached_seats(sender, instance: Enrollment, **kwargs) -> None:
+    invalidate_course(instance.course_id)
+    previous = getattr(instance, "_previous_course_id", None)
+    if previous is not None and previous != instance.course_id:
+        invalidate_course(previous)
+    invalidate_schedule(instance.student_id)
+    previous_student = getattr(instance, "_previous_student_id", None)
+    if previous_student is not None and previous_student != instance.student_id:
+        invalidate_schedule(previous_student)
+
+
+@receiver(post_save, sender=MeetingTime)
+@receiver(post_delete, sender=MeetingTime)
+def invalidate_meeting_slots(sender, instance: MeetingTime, **kwargs) -> None:
+    Course.objects.filter(pk=instance.course_id).touch()
+    invalidate_meeting_times()
+    invalidate_course(instance.course_id)
+
+
+@receiver(post_save, sender=Prerequisite)
+def compile_added_prerequisite(sender, instance: Prerequisite, created: bool, **kwargs) -> None:
+    if created:
+        prerequisite_added(instance.course_id, instance.requires_id)
+    else:
+        prerequisites_changed()
+
+
+@receiver(post_delete, sender=Prerequisite)
+def recompile_prerequisites(sender, instance: Prerequisite, **kwargs) -> None:
+    prerequisites_changed()
+
+
+@receiver(post_save, sender=Completion)
+@receiver(post_delete, sender=Completion)
+def invalidate_cached_completions(sender, instance: Completion, **kwargs) -> None:
+    invalidate_completions(instance.student_id)
+
+
+def install_search_index(sender, using: str, **kwargs) -> None:
+    """Re-create the course search index after migrations may have rebuilt the table."""
+    install_course_search(using)
+
+
+@receiver(connection_created)
+def count_connection_queries(sender, connection, **kwargs) -> None:
+    metrics.install_sql_counter(connection)
+
+
+@receiver(connection_created)
+def tune_sqlite_connection(sender, connection, **kwargs) -> None:
+    if connection.vendor != "sqlite":
+        return
+    pragmas = getattr(settings, "SQLITE_PRAGMAS", {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_cached_user(sender, instance, **kwargs) -> None:
+    auth.forget_user(instance.pk)
+
+
+@receiver(pre_delete, sender=get_user_model())
+def leave_waitlists(sender, instance, **kwargs) -> None:
+    # The cascade would drop the entries without moving anyone up or decrementing waitlist_count.
+    for course_id in list(instance.waitlist_entries.values_list("course_id", flat=True)):
+        leave_waitlist(instance, course_id)
@@ -1,15 +1,26 @@
 from django.urls import path
 
-from . import views
+from . import api, views
 
 urlpatterns = [
     path("", views.course_list, name="course_list"),
     path("courses/<int:pk>/", views.course_detail, name="course_detail"),
     path("courses/<int:pk>/enroll/", views.enroll_course, name="enroll_course"),
     path("courses/<int:pk>/drop/", views.drop_course, name="drop_course"),
+    path("courses/<int:pk>/waitlist/leave/", views.leave_course_waitlist, name="leave_waitlist"),
     path("courses/<int:pk>/edit/", views.course_edit, name="course_edit"),
     path("courses/<int:pk>/delete/", views.course_delete, name="course_delete"),
     path("my-courses/", views.my_courses, name="my_courses"),
+    path("cart/", views.cart, name="cart"),
+    path("cart/add/", views.cart_add, name="cart_add"),
+    path("cart/<int:pk>/remove/", views.cart_remove, name="cart_remove"),
     path("add-course/", views.add_course, name="add_course"),
+    path("bulk-enroll/", views.bulk_enroll_view, name="bulk_enroll"),
+    path("metrics", views.metrics_view, name="metrics"),
     path("signup/", views.signup, name="signup"),
+    path("api/courses/", api.course_list_api, name="api_course_list"),
+    path("api/courses/seats/", api.seat_availability_api, name="api_seat_availability"),
+    path("api/courses/seats/stream/", api.seat_stream_api, name="api_seat_stream"),
+    path("api/courses/<int:pk>/", api.course_detail_api, name="api_course_detail"),
+    path("api/schedule/conflicts/", api.schedule_conflicts_api, name="api_schedule_conflicts"),
 ]
@@ -1,66 +1,312 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import login
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.db.models import Q
-from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.contrib.auth.models import User
+from django.contrib.auth.views import redirect_to_login
+from django.db import transaction
+from django.http import Http404, HttpRequest, HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
 
-from .forms import CourseFilterForm, CourseForm, StudentSignUpForm
+from . import metrics
+from .admission import admission_controlled
+from .cache import (
+    Freshness,
+    cached_course,
+    catalog_facets,
+    catalog_freshness,
+    course_cards,
+    course_freshness,
+    course_page,
+)
+from .forms import BulkEnrollForm, CourseFilterForm, CourseForm, StudentSignUpForm, facet_options
 from .models import Course, Enrollment
+from .pagination import cursor_of, paginate_keyset
+from .prerequisites import ineligible_courses, missing_prerequisites
+from .schedule import find_conflicts
+from .search import is_ranked, search_courses
+from .services import (
+    EnrollOutcome,
+    awaitlist_position,
+    bulk_enroll,
+    drop_student,
+    enroll_cart,
+    enroll_student,
+    join_waitlist,
+    leave_waitlist,
+    promote_waitlist,
+)
 
+COURSES_PER_PAGE = 24
+ENROLLMENTS_PER_PAGE = 20
+CART_SESSION_KEY = "cart"
+CART_MODIFIED_SESSION_KEY = "cart_modified"
+CART_LIMIT = 12
 
-@login_required
-def course_list(request: HttpRequest) -> HttpResponse:
-    courses = Course.objects.all()
-    form = CourseFilterForm(request.GET or None)
+# Model orderings with the primary key as a tiebreaker, so keyset cursors are unique.
+COURSE_ORDERING = ("code", "pk")
+ENROLLMENT_ORDERING = ("-enrolled_at", "-pk")
+
+
+def filter_catalog(form: CourseFilterForm):
+    """The catalog queryset for ``form``'s filters and the keyset ordering to page it by."""
+    courses = Course.objects.with_seat_counts()
+    ordering = COURSE_ORDERING
     if form.is_valid():
         semester = form.cleaned_data.get("semester")
+        credits = form.cleaned_data.get("credits")
         search = form.cleaned_data.get("search")
+        # Exact facet values, so the (semester, code) index serves the filter and the ordering.
         if semester:
-            courses = courses.filter(semester__icontains=semester)
+            courses = courses.filter(semester=semester)
+        if credits is not None:
+            courses = courses.filter(credits=credits)
         if search:
-            courses = courses.filter(
-                Q(code__icontains=search)
-                | Q(title__icontains=search)
-                | Q(description__icontains=search)
-            )
-
-    enrolled_courses = set(
-        Enrollment.objects.filter(student=request.user).values_list("course_id", flat=True)
+            courses = search_courses(courses, search)
+            if is_ranked(courses):
+                ordering = ("search_rank", *COURSE_ORDERING)
+    return courses, ordering
+
+
+def alogin_required(view):
+    """``login_required`` for async views (Django 4.2's decorator only wraps sync ones)."""
+
+    @wraps(view)
+    async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        # Resolving the user here also loads the session, so the templates never hit the DB.
+        if not await sync_to_async(lambda: request.user.is_authenticated)():
+            return redirect_to_login(request.get_full_path())
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def _validators(request: HttpRequest, freshness: Freshness, *user_state) -> tuple:
+    """
+    A weak ETag and a Last-Modified time for a page, without rendering it.
+
+    ``user_state`` is whatever the page shows that is specific to this student;
+    the user and the cart in the navigation bar are always part of it. Cookies,
+    such as the CSRF token behind the page's forms, are covered by ``Vary: Cookie``.
+    """
+    user = request.user
+    parts = (freshness.version, user.pk, user.get_username(), user.is_staff, _cart(request), *user_state)
+    etag = f'W/"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+    cart_modified = request.session.get(CART_MODIFIED_SESSION_KEY)
+    last_modified = freshness.modified
+    if cart_modified:
+        last_modified = max(last_modified, datetime.fromtimestamp(cart_modified, timezone.utc))
+    return etag, last_modified
+
+
+def _with_validators(response: HttpResponse, etag: str, last_modified: datetime) -> HttpResponse:
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Per-student pages: the browser may keep a copy but must revalidate it, and shared caches must not.
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def _not_modified(request: HttpRequest, etag: str, last_modified: datetime):
+    """The 304 answering the request's revalidation, or None if the page must be rendered."""
+    # A pending flash message is only shown, and used up, by a full render.
+    if len(messages.get_messages(request)):
+        return None
+    headers = _with_validators(HttpResponse(), etag, last_modified)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(last_modified.timestamp()), response=headers
     )
-    return render(
+    return None if response is headers else response
+
+
+async def _enrolled_course_ids(user) -> set:
+    return {pk async for pk in Enrollment.objects.filter(student=user).values_list("course_id", flat=True)}
+
+
+@alogin_required
+async def course_list(request: HttpRequest) -> HttpResponse:
+    form = CourseFilterForm(request.GET or None)
+
+    def catalog():
+        courses, ordering = filter_catalog(form)
+        page = course_page(
+            form.cleaned_data if form.is_valid() else {},
+            cursor_of(courses, ordering, request.GET),
+            request.GET,
+            lambda: paginate_keyset(courses, ordering, request.GET, COURSES_PER_PAGE),
+        )
+        freshness = catalog_freshness(page.object_list, request.user.pk)
+        return page, freshness, ineligible_courses(request.user.pk, page.object_list)
+
+    def cards(page):
+        form.set_facets(facet_options(catalog_facets(), **form.selected_facets()))
+        return course_cards(page.object_list)
+
+    (page, freshness, ineligible), enrolled_courses = await asyncio.gather(
+        sync_to_async(catalog)(), _enrolled_course_ids(request.user)
+    )
+    enrolled_on_page = sorted(enrolled_courses.intersection(page.object_list))
+    etag, last_modified = _validators(request, freshness, request.GET.urlencode(), enrolled_on_page, sorted(ineligible))
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    response = render(
         request,
         "enrollment/course_list.html",
-        {"courses": courses, "form": form, "enrolled_courses": enrolled_courses},
+        {
+            "courses": await sync_to_async(cards)(page),
+            "page": page,
+            "form": form,
+            "enrolled_courses": enrolled_courses,
+            "ineligible_courses": ineligible,
+            "cart": set(_cart(request)),
+        },
     )
+    return _with_validators(response, etag, last_modified)
 
 
-@login_required
-def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
-    course = get_object_or_404(Course, pk=pk)
-    is_enrolled = Enrollment.objects.filter(student=request.user, course=course).exists()
-    return render(
+@alogin_required
+async def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    try:
+        course, is_enrolled, position = await asyncio.gather(
+            sync_to_async(cached_course)(pk),
+            Enrollment.objects.filter(student=request.user, course_id=pk).aexists(),
+            awaitlist_position(request.user, pk),
+        )
+    except Course.DoesNotExist:
+        raise Http404("No course matches the given query.")
+    position = None if is_enrolled else position
+    freshness = await sync_to_async(course_freshness)(course)
+    etag, last_modified = _validators(request, freshness, is_enrolled, position)
+    not_modified = _not_modified(request, etag, last_modified)
+    if not_modified is not None:
+        return not_modified
+    response = render(
         request,
         "enrollment/course_detail.html",
-        {"course": course, "is_enrolled": is_enrolled},
+        {"course": course, "is_enrolled": is_enrolled, "waitlist_position": position},
     )
+    return _with_validators(response, etag, last_modified)
 
 
 @login_required
+@require_POST
+@admission_controlled
 def enroll_course(request: HttpRequest, pk: int) -> HttpResponse:
+    try:
+        outcome = enroll_student(request.user, pk)
+    except Course.DoesNotExist:
+        raise Http404("No course matches the given query.")
+    if outcome is EnrollOutcome.FULL:
+        position = join_waitlist(request.user, pk)
+        # None: a seat freed up in the meantime and the queue enrolled the student straight away.
+        if position is not None:
+            messages.info(request, f"This course is full. You are #{position} on the waitlist.")
+    elif outcome is EnrollOutcome.MISSING_PREREQUISITES:
+        needed = Course.objects.filter(pk__in=missing_prerequisites(request.user.pk, pk)).values_list("code", flat=True)
+        messages.error(request, f"Complete {', '.join(needed)} before enrolling in this course.")
+    elif outcome is EnrollOutcome.CONFLICT:
+        clashes = Course.objects.filter(pk__in=find_conflicts(request.user.pk, [pk])[pk]).values_list("code", flat=True)
+        messages.error(request, f"This course meets at the same time as {', '.join(clashes)}.")
+    return redirect("course_detail", pk=pk)
+
+
+@login_required
+@require_POST
+@admission_controlled
+def drop_course(request: HttpRequest, pk: int) -> HttpResponse:
     course = get_object_or_404(Course, pk=pk)
-    if course.seats_remaining > 0:
-        Enrollment.objects.get_or_create(student=request.user, course=course)
+    drop_student(request.user, course.pk)
     return redirect("course_detail", pk=course.pk)
 
 
 @login_required
-def drop_course(request: HttpRequest, pk: int) -> HttpResponse:
+@require_POST
+def leave_course_waitlist(request: HttpRequest, pk: int) -> HttpResponse:
     course = get_object_or_404(Course, pk=pk)
-    Enrollment.objects.filter(student=request.user, course=course).delete()
+    if leave_waitlist(request.user, course.pk):
+        messages.info(request, "You left the waitlist.")
     return redirect("course_detail", pk=course.pk)
 
 
+def _cart(request: HttpRequest) -> list:
+    """Course ids in the student's registration cart, in the order they were added."""
+    return request.session.get(CART_SESSION_KEY, [])
+
+
+def _save_cart(request: HttpRequest, course_ids: list) -> None:
+    request.session[CART_SESSION_KEY] = course_ids
+    # The cart shows on every page, so their Last-Modified has to move with it.
+    request.session[CART_MODIFIED_SESSION_KEY] = time.time()
+
+
+@login_required
+@require_POST
+def cart_add(request: HttpRequest) -> HttpResponse:
+    selected = [int(pk) for pk in request.POST.getlist("courses") if pk.isdigit()]
+    cart = list(dict.fromkeys([*_cart(request), *selected]))
+    if len(cart) > CART_LIMIT:
+        messages.error(request, f"Your cart holds at most {CART_LIMIT} courses.")
+        cart = cart[:CART_LIMIT]
+    elif selected:
+        messages.success(request, f"Added {len(selected)} course{'s' if len(selected) != 1 else ''} to your cart.")
+    _save_cart(request, cart)
+    next_url = request.POST.get("next")
+    if url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}, require_https=request.is_secure()):
+        return redirect(next_url)
+    return redirect("cart")
+
+
+@login_required
+@require_POST
+def cart_remove(request: HttpRequest, pk: int) -> HttpResponse:
+    _save_cart(request, [course_id for course_id in _cart(request) if course_id != pk])
+    return redirect("cart")
+
+
+@login_required
+@admission_controlled
+def cart(request: HttpRequest) -> HttpResponse:
+    """The registration cart; posting it enrolls in every course at once and shows a result per course."""
+    course_ids = _cart(request)
+    outcomes = None
+    if request.method == "POST" and course_ids:
+        outcomes = {pair.course_id: pair.outcome for pair in enroll_cart(request.user, course_ids)}
+        # Courses now taken leave the cart; the rest stay so the student can swap them out.
+        done = (EnrollOutcome.ENROLLED, EnrollOutcome.ALREADY_ENROLLED)
+        _save_cart(
+            request, [course_id for course_id in course_ids if course_id in outcomes and outcomes[course_id] not in done]
+        )
+
+    courses = Course.objects.with_seat_counts().in_bulk(course_ids)
+    results = [(courses[pk], outcome) for pk, outcome in outcomes.items() if pk in courses] if outcomes else None
+    summary = Counter(outcome for _, outcome in results or ())
+    return render(
+        request,
+        "enrollment/cart.html",
+        {
+            "courses": [courses[pk] for pk in _cart(request) if pk in courses],
+            "ineligible_courses": ineligible_courses(request.user.pk, courses),
+            "results": results,
+            "summary": {outcome.value: summary[outcome] for outcome in EnrollOutcome},
+        },
+    )
+
+
 @user_passes_test(lambda u: u.is_staff, login_url="login")
 def add_course(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
@@ -82,7 +328,10 @@ def course_edit(request: HttpRequest, pk: int) -> HttpResponse:
     if request.method == "POST":
         form = CourseForm(request.POST, instance=course)
         if form.is_valid():
-            form.save()
+            with transaction.atomic():
+                form.save()
+                if "capacity" in form.changed_data:
+                    promote_waitlist(course.pk)
             messages.success(request, "Course updated.")
             return redirect("course_detail", pk=course.pk)
     else:
@@ -103,10 +352,31 @@ def course_delete(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, "enrollment/course_detail.html", {"course": course})
 
 
-@login_required
-def my_courses(request: HttpRequest) -> HttpResponse:
+@user_passes_test(lambda u: u.is_staff, login_url="login")
+def bulk_enroll_view(request: HttpRequest) -> HttpResponse:
+    results = None
+    if request.method == "POST":
+        form = BulkEnrollForm(request.POST)
+        if form.is_valid():
+            pairs = bulk_enroll(form.cleaned_data["students"], form.cleaned_data["courses"])
+            usernames = dict(User.objects.filter(pk__in=form.cleaned_data["students"]).values_list("pk", "username"))
+            codes = dict(Course.objects.filter(pk__in=form.cleaned_data["courses"]).values_list("pk", "code"))
+            results = [(usernames[pair.student_id], codes[pair.course_id], pair.outcome) for pair in pairs]
+    else:
+        form = BulkEnrollForm()
+    summary = Counter(outcome for _, _, outcome in results or ())
+    return render(
+        request,
+        "enrollment/bulk_enroll.html",
+        {"form": form, "results": results, "summary": {outcome.value: summary[outcome] for outcome in EnrollOutcome}},
+    )
+
+
+@alogin_required
+async def my_courses(request: HttpRequest) -> HttpResponse:
     enrollments = Enrollment.objects.filter(student=request.user).select_related("course")
-    return render(request, "enrollment/my_courses.html", {"enrollments": enrollments})
+    page = await sync_to_async(paginate_keyset)(enrollments, ENROLLMENT_ORDERING, request.GET, ENROLLMENTS_PER_PAGE)
+    return render(request, "enrollment/my_courses.html", {"enrollments": page, "page": page})
 
 
 def signup(request: HttpRequest) -> HttpResponse:
@@ -123,3 +393,12 @@ def signup(request: HttpRequest) -> HttpResponse:
     else:
         form = StudentSignUpForm()
     return render(request, "enrollment/signup.html", {"form": form})
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Prometheus scrape target: staff sessions, or ``Authorization: Bearer <METRICS_TOKEN>``."""
+    token = settings.METRICS_TOKEN
+    scraper = bool(token) and hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    if not scraper and not request.user.is_staff:
+        return HttpResponseForbidden("Metrics are available to staff only.")
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")